@@ -0,0 +1,220 @@
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import Request
+from loguru import logger
+
+from app.config import settings
+from app.exceptions import TooManyRequestsException
+from app.log import sampled
+
+
+class TokenBuckets:
+    """
+    Token bucket на каждый ключ: `rate` токенов в секунду, ёмкость `burst`.
+
+    Состояние хранится в памяти процесса; число ключей ограничено `maxsize`, давно не
+    использованные ключи вытесняются (их корзины считаются полными).
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        # Проверки, выполненные без корзины из-за ошибки хранилища (запрос допущен)
+        self.errors = 0
+
+    def acquire(self, key: str, now: float) -> float:
+        """Забирает токен; возвращает 0, если запрос разрешён, иначе время в секундах до появления токена."""
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def acquire_async(self, key: str, now: float) -> float:
+        """`acquire` для вызова из event loop."""
+        return self.acquire(key, now)
+
+
+class SQLiteTokenBuckets(TokenBuckets):
+    """
+    Token bucket с состоянием в файле SQLite, общим для нескольких процессов на одной машине.
+
+    Пополнение и списание токена выполняются одной транзакцией BEGIN IMMEDIATE, поэтому
+    корзина одного ключа корректно делится между процессами. Из event loop транзакция выполняется
+    в пуле потоков (у каждого потока своё соединение); если файл занят дольше `timeout` секунд,
+    запрос допускается без списания токена - нагрузку bcrypt по-прежнему ограничивает лимит
+    одновременных операций с паролями. Число ключей ограничивается `maxsize` при периодической
+    очистке: вытесняются давно не использованные корзины.
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int, path: str, table: str, timeout: float = 0.1):
+        super().__init__(rate, burst, maxsize)
+        self.path = path
+        self.table = table
+        self.timeout = timeout
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        connection.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_updated ON {table} (updated)")
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def acquire(self, key: str, now: float) -> float:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            (tokens,) = connection.execute(
+                f"INSERT INTO {self.table} (key, tokens, updated) VALUES (?, ?, ?) "
+                f"ON CONFLICT(key) DO UPDATE SET tokens = MIN(?, tokens + (excluded.updated - updated) * ?), "
+                f"updated = excluded.updated RETURNING tokens",
+                (key, self.burst, now, self.burst, self.rate),
+            ).fetchone()
+            wait = 0.0
+            if tokens >= 1:
+                connection.execute(f"UPDATE {self.table} SET tokens = tokens - 1 WHERE key = ?", (key,))
+            else:
+                wait = (1 - tokens) / self.rate
+            self._calls += 1
+            if self._calls % 1000 == 0:
+                self._cleanup(connection, now)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+    def _cleanup(self, connection: sqlite3.Connection, now: float) -> None:
+        # Полные корзины не отличаются от отсутствующих - удаляем их, затем давно не использованные сверх maxsize
+        connection.execute(f"DELETE FROM {self.table} WHERE updated < ?", (now - self.burst / self.rate,))
+        connection.execute(
+            f"DELETE FROM {self.table} WHERE key IN "
+            f"(SELECT key FROM {self.table} ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+    async def acquire_async(self, key: str, now: float) -> float:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self.acquire, key, now)
+        except sqlite3.OperationalError as e:
+            self.errors += 1
+            if sampled("admission.sqlite"):
+                logger.warning(f"Корзины допуска в SQLite недоступны, запрос допущен без проверки: {e}")
+            return 0.0
+
+
+class AdmissionController:
+    """
+    Контроль допуска к дорогим операциям с паролями (вход, регистрация).
+
+    Запрос отклоняется с 429 и заголовком Retry-After до начала работы bcrypt, если исчерпан
+    token bucket клиентского IP или email, либо если в процессе уже выполняется `max_password_ops`
+    операций с паролями. Так всплеск подбора паролей не занимает все воркеры и не вытесняет
+    дешёвые эндпоинты.
+    """
+
+    def __init__(
+            self,
+            ip_buckets: TokenBuckets,
+            email_buckets: TokenBuckets,
+            max_password_ops: int,
+            enabled: bool = True
+    ):
+        self.ip_buckets = ip_buckets
+        self.email_buckets = email_buckets
+        self.max_password_ops = max_password_ops
+        self.enabled = enabled
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected_ip = 0
+        self.rejected_email = 0
+        self.rejected_busy = 0
+
+    @asynccontextmanager
+    async def password_operation(self, client_ip: str | None, email: str | None) -> AsyncIterator[None]:
+        """Допускает операцию с паролем или выбрасывает TooManyRequestsException; занимает слот на время блока."""
+        if not self.enabled:
+            yield
+            return
+        # Время по часам системы: состояние в SQLite общее для процессов
+        now = time.time()
+        if client_ip:
+            wait = await self.ip_buckets.acquire_async(client_ip, now)
+            if wait:
+                self.rejected_ip += 1
+                raise TooManyRequestsException(retry_after=math.ceil(wait))
+        if email:
+            wait = await self.email_buckets.acquire_async(email.lower(), now)
+            if wait:
+                self.rejected_email += 1
+                raise TooManyRequestsException(retry_after=math.ceil(wait))
+        if self.in_flight >= self.max_password_ops:
+            self.rejected_busy += 1
+            raise TooManyRequestsException(retry_after=1)
+
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "max_password_ops": self.max_password_ops,
+            "admitted": self.admitted,
+            "rejected_ip": self.rejected_ip,
+            "rejected_email": self.rejected_email,
+            "rejected_busy": self.rejected_busy,
+            "bucket_errors": self.ip_buckets.errors + self.email_buckets.errors,
+        }
+
+
+def client_ip(request: Request) -> str | None:
+    """IP клиента; за прокси следует запускать uvicorn с --proxy-headers."""
+    return request.client.host if request.client else None
+
+
+def _buckets(rate: float, burst: int, table: str) -> TokenBuckets:
+    if settings.ADMISSION_SQLITE_PATH:
+        return SQLiteTokenBuckets(
+            rate, burst, settings.ADMISSION_MAX_KEYS, settings.ADMISSION_SQLITE_PATH, table,
+            timeout=settings.ADMISSION_SQLITE_TIMEOUT,
+        )
+    return TokenBuckets(rate, burst, settings.ADMISSION_MAX_KEYS)
+
+
+admission_controller = AdmissionController(
+    ip_buckets=_buckets(settings.ADMISSION_IP_RATE, settings.ADMISSION_IP_BURST, "ip_buckets"),
+    email_buckets=_buckets(settings.ADMISSION_EMAIL_RATE, settings.ADMISSION_EMAIL_BURST, "email_buckets"),
+    max_password_ops=settings.ADMISSION_MAX_PASSWORD_OPS,
+    enabled=settings.ADMISSION_ENABLED,
+)
@@ -1,10 +1,129 @@
-from app.dao.base import BaseDAO
-from app.auth.models import User, Role
+from datetime import datetime
+from typing import Iterable, List
+
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.dao.base import BaseDAO, as_dict, instrumented
+from app.dao.database import on_commit
+from app.auth.models import User, Role, RevokedToken
+from app.auth.principal import token_versions
+from app.auth.roles import role_registry
+from app.config import settings
+
+# Поля, изменение которых отзывает выданные access-токены пользователя
+TOKEN_CLAIM_FIELDS = frozenset({'role_id', 'password'})
+
+
+# Увеличение версии токенов с новыми значениями; синхронизация сессии - по возвращённым строкам
+_bump_token_versions = (
+    update(User)
+    .values(token_version=User.token_version + 1)
+    .returning(User.id, User.token_version)
+    .execution_options(synchronize_session=False)
+)
 
 
 class UsersDAO(BaseDAO):
     model = User
+    identity_cache_size = settings.USERS_CACHE_SIZE
+    identity_cache_ttl = settings.USERS_CACHE_TTL
+
+    async def _bump_token_versions(self, query, params: dict | None = None) -> None:
+        """
+        Увеличивает версию токенов пользователей, отобранных запросом, в транзакции сессии.
+
+        Загруженные в сессию пользователи получают новую версию сразу, известные процессу версии
+        обновляются после фиксации транзакции.
+        """
+        rows = (await self._session.execute(query, params)).all()
+        identity_map = self._session.identity_map
+        for user_id, version in rows:
+            user = identity_map.get(identity_key(User, user_id))
+            if user is not None:
+                set_committed_value(user, 'token_version', version)
+            self._invalidate({'id': user_id})
+        on_commit(self._session, lambda: token_versions.observe_many(rows))
+
+    async def _bump_token_versions_by_filter(self, filter_dict: dict) -> None:
+        query, params = self._statement(
+            'bump_token_versions', filter_dict, lambda where: _bump_token_versions.where(*where))
+        await self._bump_token_versions(query, params)
+
+    async def _bump_token_versions_by_ids(self, user_ids: Iterable[int]) -> None:
+        user_ids = list(user_ids)
+        if user_ids:
+            await self._bump_token_versions(_bump_token_versions.where(User.id.in_(user_ids)))
+
+    @instrumented
+    async def update(self, filters: BaseModel | dict, values: BaseModel | dict):
+        filter_dict = as_dict(filters)
+        values_dict = as_dict(values)
+        # Версия увеличивается до изменения: фильтр может зависеть от изменяемых полей
+        if TOKEN_CLAIM_FIELDS & values_dict.keys():
+            await self._bump_token_versions_by_filter(filter_dict)
+        return await super().update(filter_dict, values_dict)
+
+    @instrumented
+    async def delete(self, filters: BaseModel | dict):
+        filter_dict = as_dict(filters)
+        if filter_dict:
+            await self._bump_token_versions_by_filter(filter_dict)
+        return await super().delete(filter_dict)
+
+    @instrumented
+    async def upsert_many(self, values: List[BaseModel | dict], conflict_column: str) -> List[int]:
+        values = [as_dict(item) for item in values]
+        ids = await super().upsert_many(values, conflict_column)
+        if any(TOKEN_CLAIM_FIELDS & item.keys() for item in values):
+            await self._bump_token_versions_by_ids(ids)
+        return ids
+
+    @instrumented
+    async def bulk_update(self, records: List[BaseModel | dict]):
+        records = [as_dict(record) for record in records]
+        count = await super().bulk_update(records)
+        await self._bump_token_versions_by_ids(
+            record['id'] for record in records if 'id' in record and TOKEN_CLAIM_FIELDS & record.keys())
+        return count
 
 
 class RoleDAO(BaseDAO):
     model = Role
+
+    async def _after_write(self) -> None:
+        # Роли изменились - справочник в памяти заменяется только после фиксации транзакции
+        roles = (await self._session.execute(select(Role.id, Role.name))).all()
+        on_commit(self._session, lambda: role_registry.set_roles(roles))
+
+
+class RevokedTokenDAO(BaseDAO):
+    model = RevokedToken
+
+    @instrumented
+    async def find_active(self, since: datetime | None, now: int) -> list:
+        """Отозванные токены, записанные не раньше since (все при None), срок действия которых ещё не истёк."""
+        query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+        if since is not None:
+            query = query.where(RevokedToken.created_at >= since)
+        try:
+            result = await self._session.execute(query)
+            return result.all()
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при загрузке отозванных токенов: {error}", error=e)
+            raise
+
+    @instrumented
+    async def delete_expired(self, now: int) -> int:
+        """Удаляет записи о токенах с истёкшим сроком действия."""
+        try:
+            result = await self._session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            logger.debug("Удалено {count} истёкших отозванных токенов.", count=result.rowcount)
+            return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при удалении истёкших отозванных токенов: {error}", error=e)
+            raise
@@ -1,4 +1,4 @@
-from sqlalchemy import text, ForeignKey
+from sqlalchemy import text, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.dao.database import Base, str_uniq
 
@@ -18,9 +18,26 @@ class User(Base):
     email: Mapped[str_uniq]
     password: Mapped[str]
     role_id: Mapped[int] = mapped_column(ForeignKey('roles.id'), default=1, server_default=text("1"))
-    role: Mapped["Role"] = relationship("Role", back_populates="users", lazy="joined")
-    email_verified: Mapped[int]
-    phone_verified: Mapped[int]
+    # Роль не подгружается вместе с пользователем: название берётся из справочника ролей в памяти
+    role: Mapped["Role"] = relationship("Role", back_populates="users")
+    email_verified: Mapped[int] = mapped_column(default=0)
+    phone_verified: Mapped[int] = mapped_column(default=0)
+    # Версия access-токенов: увеличивается при смене роли или пароля и отзывает ранее выданные токены
+    token_version: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+
+    # По updated_at процессы дочитывают изменения версий токенов
+    __table_args__ = (Index('ix_users_updated_at', 'updated_at'),)
 
     def __repr__(self):
         return f"{self.__class__.__name__}(id={self.id})"
+
+
+class RevokedToken(Base):
+    __tablename__ = 'revoked_tokens'
+
+    jti: Mapped[str_uniq]
+    # Срок действия отозванного токена (unix timestamp), после него запись удаляется
+    expires_at: Mapped[int] = mapped_column(index=True)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(jti={self.jti})"
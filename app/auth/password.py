@@ -0,0 +1,148 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+
+from loguru import logger
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.metrics import GaugeCallback, password_duration, registry
+from app.timing import timed
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _timed(func: Callable, *args):
+    """Выполняет функцию в воркере и возвращает результат вместе со временем выполнения."""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """
+    Сервис хеширования паролей, выполняющий bcrypt в пуле воркеров вне event loop.
+
+    Число одновременно принятых операций ограничено `workers + queue_size`: при заполнении
+    очереди новые вызовы ждут свободного места, а не копят задачи в executor.
+    """
+
+    def __init__(self, executor: str = "thread", workers: int = 4, queue_size: int = 64):
+        if executor not in ("thread", "process"):
+            raise ValueError("Тип пула должен быть 'thread' или 'process'")
+        self.executor_kind = executor
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Executor | None = None
+        # Семафор создаётся в своём event loop при первом вызове: экземпляр модульный, а loop может смениться
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+
+        self.waiting = 0  # ждут места в очереди
+        self.queued = 0  # приняты, но ещё выполняются или ждут воркера
+        self.completed = 0
+        self.failed = 0
+        self.total_latency = 0.0
+        self.total_run_time = 0.0
+        self.max_latency = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers + self.queue_size)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _submit(self, operation: str, func: Callable, *args):
+        slots = self._get_slots()
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_time = await loop.run_in_executor(self._get_executor(), _timed, func, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.queued -= 1
+            slots.release()
+
+        latency = time.perf_counter() - started
+        password_duration.observe(latency, operation)
+        self.completed += 1
+        self.total_latency += latency
+        self.total_run_time += run_time
+        if latency > self.max_latency:
+            self.max_latency = latency
+        return result
+
+    async def hash(self, password: str) -> str:
+        with timed("password"):
+            return await self._submit("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        with timed("password"):
+            return await self._submit("verify", verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Счётчики глубины очереди и задержек."""
+        completed = self.completed or 1
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "waiting": self.waiting,
+            "queued": self.queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_latency_ms": self.total_latency / completed * 1000,
+            "avg_run_time_ms": self.total_run_time / completed * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            logger.info(f"Остановка пула хеширования паролей: {self.stats()}")
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._slots = self._slots_loop = None
+
+
+password_hasher = PasswordHasher(
+    executor=settings.PASSWORD_HASHER_EXECUTOR,
+    workers=settings.PASSWORD_HASHER_WORKERS,
+    queue_size=settings.PASSWORD_HASHER_QUEUE_SIZE,
+)
+
+registry.register(GaugeCallback(
+    "password_hasher_waiting", "Операции с паролями, ожидающие места в очереди пула", (),
+    lambda: [((), password_hasher.waiting)]))
+registry.register(GaugeCallback(
+    "password_hasher_queued", "Операции с паролями, принятые в пул (выполняются или ждут воркера)", (),
+    lambda: [((), password_hasher.queued)]))
+registry.register(GaugeCallback(
+    "password_hasher_capacity", "Максимум одновременно принятых операций с паролями (workers + queue_size)", (),
+    lambda: [((), password_hasher.workers + password_hasher.queue_size)]))
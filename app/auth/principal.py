@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.auth.roles import role_registry
+from app.config import settings
+
+# Перекрытие окна синхронизации: строки, изменённые транзакциями, которые ещё не были зафиксированы
+# к прошлой синхронизации, получают updated_at раньше её момента
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Аутентифицированный пользователь по данным access-токена, без обращения к БД."""
+    id: int
+    role_id: int
+    role_name: str
+    version: int
+
+    @property
+    def is_admin(self) -> bool:
+        return role_registry.is_admin(self.role_id)
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            role_id=user.role_id,
+            role_name=role_registry.name_of(user.role_id),
+            version=token_version(user),
+        )
+
+
+class TokenVersions:
+    """
+    Известные процессу версии access-токенов пользователей.
+
+    Источник истины - колонка users.token_version: она увеличивается при смене роли или пароля,
+    а токен с ролью содержит версию, действовавшую при его выпуске. Токен с версией меньше известной
+    отклоняется; большая версия означает изменение, о котором процесс ещё не знает, и запоминается.
+    Изменения этого процесса применяются после фиксации транзакции, изменения других процессов
+    и скриптов дочитываются фоновой синхронизацией по users.updated_at. Запись хранится в течение
+    срока жизни access-токена: после него все токены, выпущенные до изменения, истекли сами.
+
+    Удаление пользователя отзывает его токены только в процессе, который его удалил: строки уже нет,
+    и синхронизация его не видит. В остальных процессах такие токены действуют до истечения.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._versions: dict[int, int] = {}
+        self._expiry: list[tuple[float, int, int]] = []
+        self._synced_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def current(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def accept(self, user_id: int, version: int) -> bool:
+        """Проверяет версию токена: False для токена, выпущенного до последнего изменения пользователя."""
+        known = self._versions.get(user_id, 0)
+        if version < known:
+            return False
+        if version > known:
+            self.observe(user_id, version)
+        return True
+
+    def observe(self, user_id: int, version: int, now: float | None = None) -> None:
+        """Запоминает версию токенов пользователя, если она новее известной."""
+        if version <= self._versions.get(user_id, 0):
+            return
+        self._versions[user_id] = version
+        expires_at = (time.time() if now is None else now) + self.window
+        heapq.heappush(self._expiry, (expires_at, user_id, version))
+
+    def observe_many(self, rows: Iterable[tuple[int, int]]) -> None:
+        for user_id, version in rows:
+            self.observe(user_id, version)
+
+    def prune(self, now: float | None = None) -> int:
+        """Удаляет версии, изменённые раньше срока жизни access-токена."""
+        now = time.time() if now is None else now
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, user_id, version = heapq.heappop(self._expiry)
+            if self._versions.get(user_id) == version:
+                del self._versions[user_id]
+                removed += 1
+        return removed
+
+    async def sync(self, session: AsyncSession) -> None:
+        """Дочитывает версии пользователей, изменённых с прошлой синхронизации, и удаляет устаревшие."""
+        from app.auth.models import User
+
+        # Время берётся из БД, как и updated_at; при первой загрузке нужны изменения за срок жизни токена
+        db_now = (await session.execute(select(func.now()))).scalar_one()
+        since = self._synced_at - _SYNC_OVERLAP if self._synced_at else db_now - timedelta(seconds=self.window)
+        result = await session.execute(
+            select(User.id, User.token_version).where(User.updated_at >= since, User.token_version > 0))
+        self.observe_many(result.all())
+        self._synced_at = db_now
+        self.prune()
+
+    async def load(self, session: AsyncSession) -> None:
+        await self.sync(session)
+        logger.info(f"Загружено версий токенов пользователей: {len(self._versions)}")
+
+    async def run_sync(self, session_maker: async_sessionmaker, interval: float) -> None:
+        """Фоновая задача: периодическая синхронизация версий с БД."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_maker() as session:
+                    await self.sync(session)
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации версий токенов: {e}")
+
+
+token_versions = TokenVersions(window=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def token_version(user) -> int:
+    """Версия токенов пользователя: по загруженной строке или новее, если изменение уже известно процессу."""
+    return max(user.token_version, token_versions.current(user.id))
+
+
+def access_claims(user) -> dict:
+    """Дополнительные claims access-токена: роль и версия токенов пользователя."""
+    return {
+        "role_id": user.role_id,
+        "role": role_registry.name_of(user.role_id),
+        "ver": token_version(user),
+    }
+
+
+def principal_from_payload(payload: dict) -> Principal | None:
+    """Principal из claims access-токена или None, если токен выпущен без роли."""
+    try:
+        return Principal(
+            id=int(payload["sub"]),
+            role_id=int(payload["role_id"]),
+            role_name=payload["role"],
+            version=int(payload["ver"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,94 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.auth.dao import RevokedTokenDAO
+
+# Записи перечитываются с перекрытием: транзакция, начатая до прошлой синхронизации,
+# фиксирует запись с более ранним created_at (и меньшим ID) уже после неё
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class TokenRevocationList:
+    """
+    Отозванные токены (jti) в памяти процесса.
+
+    Проверка - поиск в словаре, O(1) и без обращения к БД. Источник истины - таблица revoked_tokens:
+    при старте список загружается из неё, затем фоновая задача дочитывает записи других процессов.
+    Записи удаляются по истечении срока действия токена: такой токен и так отклоняется проверкой exp.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, int] = {}
+        self._expiry: list[tuple[int, str]] = []
+        self._synced_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str | None) -> bool:
+        return jti in self._revoked
+
+    def add(self, jti: str, expires_at: int) -> None:
+        if jti not in self._revoked:
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._expiry, (expires_at, jti))
+
+    def prune(self, now: float | None = None) -> int:
+        """Удаляет из памяти токены с истёкшим сроком действия."""
+        now = time.time() if now is None else now
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry)
+            del self._revoked[jti]
+            removed += 1
+        return removed
+
+    async def revoke(self, session: AsyncSession, payload: dict) -> bool:
+        """
+        Отзывает токен по его payload: сразу в памяти и записью в revoked_tokens в транзакции сессии.
+
+        Returns:
+            bool: False, если токен без jti или уже истёк и отзывать его не нужно
+        """
+        jti, expires_at = payload.get('jti'), payload.get('exp')
+        if not jti or not expires_at or expires_at <= time.time():
+            return False
+        self.add(jti, int(expires_at))
+        await RevokedTokenDAO(session).upsert({'jti': jti, 'expires_at': int(expires_at)}, conflict_column='jti')
+        return True
+
+    async def sync(self, session: AsyncSession) -> None:
+        """Дочитывает новые записи revoked_tokens и удаляет истёкшие токены из памяти."""
+        now = int(time.time())
+        # Время берётся из БД, как и created_at; уже известные jti при повторном чтении пропускаются
+        db_now = (await session.execute(select(func.now()))).scalar_one()
+        since = self._synced_at - _SYNC_OVERLAP if self._synced_at else None
+        for row in await RevokedTokenDAO(session).find_active(since=since, now=now):
+            self.add(row.jti, row.expires_at)
+        self._synced_at = db_now
+        self.prune(now)
+
+    async def load(self, session: AsyncSession) -> None:
+        await self.sync(session)
+        logger.info(f"Загружено отозванных токенов: {len(self._revoked)}")
+
+    async def run_sync(self, session_maker: async_sessionmaker, interval: float) -> None:
+        """Фоновая задача: периодическая синхронизация с БД и удаление истёкших записей из таблицы."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_maker() as session:
+                    await self.sync(session)
+                    await RevokedTokenDAO(session).delete_expired(now=int(time.time()))
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации отозванных токенов: {e}")
+
+
+token_revocations = TokenRevocationList()
@@ -0,0 +1,89 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Iterable
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.log import sampled
+
+# Название роли, отсутствующей в справочнике (например, созданной другим процессом до синхронизации)
+UNKNOWN_ROLE_NAME = "Unknown"
+
+
+@dataclass(frozen=True, slots=True)
+class RoleInfo:
+    id: int
+    name: str
+
+
+class RoleRegistry:
+    """
+    Справочник ролей в памяти процесса.
+
+    Загружается при старте приложения, перезагружается RoleDAO после фиксации изменений ролей
+    и периодически синхронизируется с БД, чтобы увидеть изменения других процессов. Загрузка
+    пользователя не требует JOIN с таблицей roles.
+    """
+
+    def __init__(self, admin_role_names: Iterable[str]):
+        self.admin_role_names = frozenset(admin_role_names)
+        self._by_id: dict[int, RoleInfo] = {}
+        self._by_name: dict[str, RoleInfo] = {}
+        self.admin_role_ids: frozenset[int] = frozenset()
+        self.loaded = False
+
+    def set_roles(self, roles: Iterable[tuple[int, str]]) -> bool:
+        """Заменяет справочник; возвращает True, если набор ролей изменился."""
+        by_id = {role_id: RoleInfo(id=role_id, name=name) for role_id, name in roles}
+        changed = by_id != self._by_id
+        self._by_id = by_id
+        self._by_name = {role.name: role for role in by_id.values()}
+        self.admin_role_ids = frozenset(role.id for role in by_id.values() if role.name in self.admin_role_names)
+        self.loaded = True
+        return changed
+
+    async def load(self, session: AsyncSession) -> None:
+        from app.auth.models import Role
+
+        result = await session.execute(select(Role.id, Role.name))
+        if self.set_roles(result.all()):
+            logger.info(f"Загружено ролей: {len(self._by_id)}, административные ID: {sorted(self.admin_role_ids)}")
+
+    async def run_sync(self, session_maker: async_sessionmaker, interval: float) -> None:
+        """Фоновая задача: периодическая перезагрузка справочника из БД."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_maker() as session:
+                    await self.load(session)
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации справочника ролей: {e}")
+
+    def get(self, role_id: int) -> RoleInfo:
+        try:
+            return self._by_id[role_id]
+        except KeyError:
+            if not self.loaded:
+                raise RuntimeError("Справочник ролей не загружен") from None
+            raise LookupError(f"Роль с ID {role_id} не найдена") from None
+
+    def get_by_name(self, name: str) -> RoleInfo | None:
+        return self._by_name.get(name)
+
+    def name_of(self, role_id: int) -> str:
+        """Название роли; для неизвестной роли - UNKNOWN_ROLE_NAME, чтобы не ломать сериализацию ответа."""
+        role = self._by_id.get(role_id)
+        if role is not None:
+            return role.name
+        if sampled("roles.unknown"):
+            logger.warning(f"Роль с ID {role_id} отсутствует в справочнике ролей")
+        return UNKNOWN_ROLE_NAME
+
+    def is_admin(self, role_id: int) -> bool:
+        return role_id in self.admin_role_ids
+
+
+role_registry = RoleRegistry(admin_role_names=settings.ADMIN_ROLE_NAMES)
@@ -1,52 +1,67 @@
 from typing import List
-from fastapi import APIRouter, Response, Depends
+from fastapi import APIRouter, Request, Response, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.admission import admission_controller, client_ip
 from app.auth.models import User
-from app.auth.utils import authenticate_user, set_tokens
-from app.dependencies.auth_dep import get_current_user, get_current_admin_user, check_refresh_token
+from app.auth.password import password_hasher
+from app.auth.revocation import token_revocations
+from app.auth.utils import authenticate_user, set_tokens, decode_token_claims
+from app.auth.principal import Principal
+from app.dependencies.auth_dep import get_current_user, get_current_admin_principal, check_refresh_token
 from app.dependencies.dao_dep import get_session_with_commit, get_session_without_commit
-from app.exceptions import UserAlreadyExistsException, IncorrectEmailOrPasswordException
+from app.config import settings
+from app.exceptions import UserAlreadyExistsException, IncorrectEmailOrPasswordException, InvalidCursorException
 from app.auth.dao import UsersDAO
-from app.auth.schemas import SUserRegister, SUserAuth, EmailModel, SUserAddDB, SUserInfo
+from app.dao.base import UniqueViolationError
+from app.auth.schemas import (
+    SUserRegister, SUserAuth, EmailModel, SUserAddDB, SUserInfo, SUserPage, USER_INFO_COLUMNS, users_info_adapter,
+    user_info_adapter, user_page_adapter
+)
+from app.responses import json_response, trusted_models
 
 router = APIRouter()
 
 
 @router.post("/register/")
-async def register_user(user_data: SUserRegister,
+async def register_user(request: Request,
+                        user_data: SUserRegister,
                         session: AsyncSession = Depends(get_session_with_commit)) -> dict:
-    # Проверка существования пользователя
-    user_dao = UsersDAO(session)
-
-    existing_user = await user_dao.find_one_or_none(filters=EmailModel(email=user_data.email))
-    if existing_user:
-        raise UserAlreadyExistsException
-
     # Подготовка данных для добавления
     user_data_dict = user_data.model_dump()
     user_data_dict.pop('confirm_password', None)
-
-    # Добавление пользователя
-    await user_dao.add(values=SUserAddDB(**user_data_dict))
+    # Хешируем пароль в пуле воркеров, не блокируя event loop; при перегрузке - 429 до начала хеширования
+    async with admission_controller.password_operation(client_ip(request), user_data.email):
+        user_data_dict['password'] = await password_hasher.hash(user_data.password)
+
+    # Вставка без предварительной проверки: занятые почту или телефон определяет ограничение уникальности
+    try:
+        await UsersDAO(session).insert(values=SUserAddDB(**user_data_dict))
+    except UniqueViolationError as e:
+        if e.columns & {'email', 'phone_number'}:
+            raise UserAlreadyExistsException
+        raise
 
     return {'message': 'Вы успешно зарегистрированы!'}
 
 
 @router.post("/login/")
 async def auth_user(
+        request: Request,
         response: Response,
         user_data: SUserAuth,
         session: AsyncSession = Depends(get_session_without_commit)
 ) -> dict:
-    users_dao = UsersDAO(session)
-    user = await users_dao.find_one_or_none(
-        filters=EmailModel(email=user_data.email)
-    )
-
-    if not (user and await authenticate_user(user=user, password=user_data.password)):
-        raise IncorrectEmailOrPasswordException
-    set_tokens(response, user.id)
+    # При превышении лимитов - 429 до обращения к БД и проверки пароля
+    async with admission_controller.password_operation(client_ip(request), user_data.email):
+        users_dao = UsersDAO(session)
+        user = await users_dao.find_one_or_none(
+            filters=EmailModel(email=user_data.email)
+        )
+
+        if not (user and await authenticate_user(user=user, password=user_data.password)):
+            raise IncorrectEmailOrPasswordException
+    set_tokens(response, user)
     return {
         'ok': True,
         'message': 'Авторизация успешна!'
@@ -54,22 +69,53 @@ async def auth_user(
 
 
 @router.post("/logout")
-async def logout(response: Response):
+async def logout(
+        request: Request,
+        response: Response,
+        session: AsyncSession = Depends(get_session_with_commit)
+):
+    # Отзываем оба токена: украденный refresh_token не должен работать после выхода
+    for cookie in ("user_access_token", "user_refresh_token"):
+        token = request.cookies.get(cookie)
+        payload = decode_token_claims(token) if token else None
+        if payload:
+            await token_revocations.revoke(session, payload)
     response.delete_cookie("user_access_token")
     response.delete_cookie("user_refresh_token")
     return {'message': 'Пользователь успешно вышел из системы'}
 
 
-@router.get("/me/")
-async def get_me(user_data: User = Depends(get_current_user)) -> SUserInfo:
-    return SUserInfo.model_validate(user_data)
+@router.get("/me/", response_model=SUserInfo)
+async def get_me(response: Response, user_data: User = Depends(get_current_user)) -> Response:
+    return json_response(user_info_adapter, trusted_models(SUserInfo, [user_data])[0], response=response)
+
+
+@router.get("/all_users/", response_model=List[SUserInfo])
+async def get_all_users(response: Response,
+                        session: AsyncSession = Depends(get_session_with_commit),
+                        user_data: Principal = Depends(get_current_admin_principal)
+                        ) -> Response:
+    users = await UsersDAO(session).find_all(columns=USER_INFO_COLUMNS)
+    return json_response(users_info_adapter, trusted_models(SUserInfo, users), response=response)
 
 
-@router.get("/all_users/")
-async def get_all_users(session: AsyncSession = Depends(get_session_with_commit),
-                        user_data: User = Depends(get_current_admin_user)
-                        ) -> List[SUserInfo]:
-    return await UsersDAO(session).find_all()
+@router.get("/users/", response_model=SUserPage)
+async def get_users_page(
+        response: Response,
+        limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+        cursor: str | None = None,
+        session: AsyncSession = Depends(get_session_without_commit),
+        user_data: Principal = Depends(get_current_admin_principal)
+) -> Response:
+    try:
+        page = await UsersDAO(session).find_page(limit=limit, cursor=cursor, columns=USER_INFO_COLUMNS)
+    except ValueError:
+        raise InvalidCursorException
+    return json_response(
+        user_page_adapter,
+        SUserPage.model_construct(items=trusted_models(SUserInfo, page.items), next_cursor=page.next_cursor),
+        response=response
+    )
 
 
 @router.post("/refresh")
@@ -77,5 +123,5 @@ async def process_refresh_token(
         response: Response,
         user: User = Depends(check_refresh_token)
 ):
-    set_tokens(response, user.id)
+    set_tokens(response, user)
     return {"message": "Токены успешно обновлены"}
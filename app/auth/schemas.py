@@ -1,7 +1,9 @@
 import re
 from typing import Self
-from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator, model_validator, computed_field
-from app.auth.utils import get_password_hash
+from pydantic import (
+    BaseModel, ConfigDict, EmailStr, Field, TypeAdapter, field_validator, model_validator, computed_field
+)
+from app.auth.roles import role_registry
 
 
 class EmailModel(BaseModel):
@@ -29,7 +31,6 @@ class SUserRegister(UserBase):
     def check_password(self) -> Self:
         if self.password != self.confirm_password:
             raise ValueError("Пароли не совпадают")
-        self.password = get_password_hash(self.password)  # хешируем пароль до сохранения в базе данных
         return self
 
 
@@ -41,20 +42,25 @@ class SUserAuth(EmailModel):
     password: str = Field(min_length=5, max_length=50, description="Пароль, от 5 до 50 знаков")
 
 
-class RoleModel(BaseModel):
-    id: int = Field(description="Идентификатор роли")
-    name: str = Field(description="Название роли")
-    model_config = ConfigDict(from_attributes=True)
-
-
 class SUserInfo(UserBase):
     id: int = Field(description="Идентификатор пользователя")
-    role: RoleModel = Field(exclude=True)
+    role_id: int = Field(description="Идентификатор роли")
 
     @computed_field
     def role_name(self) -> str:
-        return self.role.name
+        return role_registry.name_of(self.role_id)
 
-    @computed_field
-    def role_id(self) -> int:
-        return self.role.id
+
+class SUserPage(BaseModel):
+    items: list[SUserInfo] = Field(description="Пользователи на странице")
+    next_cursor: str | None = Field(description="Курсор следующей страницы, None на последней странице")
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Адаптеры собираются один раз при импорте и используются для сериализации списков сразу в байты JSON
+user_info_adapter = TypeAdapter(SUserInfo)
+users_info_adapter = TypeAdapter(list[SUserInfo])
+user_page_adapter = TypeAdapter(SUserPage)
+
+# Колонки таблицы users, нужные для SUserInfo: списки пользователей читаются проекцией без полных ORM-объектов
+USER_INFO_COLUMNS = tuple(SUserInfo.model_fields)
@@ -1,18 +1,28 @@
-from passlib.context import CryptContext
-from jose import jwt
+import uuid
+from jose import jwt, ExpiredSignatureError, JWTError
 from datetime import datetime, timedelta, timezone
 from fastapi.responses import Response
+from app.auth.password import password_hasher
+from app.auth.principal import access_claims
+from app.cache import TTLCache
 from app.config import settings
+from app.metrics import token_decodes
+from app.timing import timed
 
+# Проверенные payload access-токенов, хранятся до истечения `exp` самого токена
+access_token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, enabled=settings.TOKEN_CACHE_ENABLED)
 
-def create_tokens(data: dict) -> dict:
+
+def create_tokens(data: dict, access_claims: dict | None = None) -> dict:
     # Текущее время в UTC
     now = datetime.now(timezone.utc)
 
-    # AccessToken - 30 минут
-    access_expire = now + timedelta(minutes=30)
+    # AccessToken - ACCESS_TOKEN_EXPIRE_MINUTES минут
+    access_expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_payload = data.copy()
-    access_payload.update({"exp": int(access_expire.timestamp()), "type": "access"})
+    if access_claims:
+        access_payload.update(access_claims)
+    access_payload.update({"exp": int(access_expire.timestamp()), "type": "access", "jti": uuid.uuid4().hex})
     access_token = jwt.encode(
         access_payload,
         settings.SECRET_KEY,
@@ -22,7 +32,7 @@ def create_tokens(data: dict) -> dict:
     # RefreshToken - 1 дней
     refresh_expire = now + timedelta(days=1)
     refresh_payload = data.copy()
-    refresh_payload.update({"exp": int(refresh_expire.timestamp()), "type": "refresh"})
+    refresh_payload.update({"exp": int(refresh_expire.timestamp()), "type": "refresh", "jti": uuid.uuid4().hex})
     refresh_token = jwt.encode(
         refresh_payload,
         settings.SECRET_KEY,
@@ -31,14 +41,56 @@ def create_tokens(data: dict) -> dict:
     return {"access_token": access_token, "refresh_token": refresh_token}
 
 
+def decode_access_token(token: str) -> dict:
+    """
+    Декодирует access_token с проверкой подписи и срока действия.
+
+    Повторные вызовы с тем же токеном обслуживаются из кеша без проверки подписи,
+    пока не наступит его `exp`. Возвращаемый словарь общий для всех запросов и не должен изменяться.
+    """
+    payload = access_token_cache.get(token)
+    if payload is not None:
+        token_decodes.inc("access", "cached")
+        return payload
+
+    try:
+        with timed("token"):
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        token_decodes.inc("access", "invalid")
+        raise
+    token_decodes.inc("access", "decoded")
+    expire = payload.get('exp')
+    if not expire:
+        raise ExpiredSignatureError("Токен не содержит срока действия")
+    access_token_cache.set(token, payload, expires_at=int(expire))
+    return payload
+
+
+def decode_token_claims(token: str) -> dict | None:
+    """Декодирует токен с проверкой подписи, но без проверки срока действия; None для невалидного токена."""
+    try:
+        with timed("token"):
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM], options={"verify_exp": False}
+            )
+    except JWTError:
+        token_decodes.inc("claims", "invalid")
+        return None
+    token_decodes.inc("claims", "decoded")
+    return payload
+
+
 async def authenticate_user(user, password):
-    if not user or verify_password(plain_password=password, hashed_password=user.password) is False:
+    if not user or await password_hasher.verify(plain_password=password, hashed_password=user.password) is False:
         return None
     return user
 
 
-def set_tokens(response: Response, user_id: int):
-    new_tokens = create_tokens(data={"sub": str(user_id)})
+def set_tokens(response: Response, user):
+    # Роль и версия токенов в access-токене позволяют проверять права без обращения к БД
+    claims = access_claims(user) if settings.TOKEN_ROLE_CLAIMS else None
+    new_tokens = create_tokens(data={"sub": str(user.id)}, access_claims=claims)
     access_token = new_tokens.get('access_token')
     refresh_token = new_tokens.get("refresh_token")
 
@@ -58,13 +110,3 @@ def set_tokens(response: Response, user_id: int):
         samesite="lax"
     )
 
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
@@ -8,6 +8,104 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
 
+    # Логирование: общий уровень, уровни по модулям ({"app.dao": "DEBUG"}), очередь записи и сэмплирование
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {}
+    LOG_ENQUEUE: bool = True
+    LOG_JSON: bool = False
+    LOG_SAMPLE_EVERY: int = 1
+
+    # Заголовок Server-Timing с длительностями фаз запроса и необязательная запись этих длительностей в лог
+    SERVER_TIMING_ENABLED: bool = True
+    SERVER_TIMING_LOG: bool = False
+
+    # Эндпоинт /metrics в формате Prometheus; в продакшне доступ к нему стоит ограничить на уровне прокси
+    METRICS_ENABLED: bool = True
+
+    # Пул хеширования паролей: "thread" или "process"
+    PASSWORD_HASHER_EXECUTOR: str = "thread"
+    PASSWORD_HASHER_WORKERS: int = 4
+    PASSWORD_HASHER_QUEUE_SIZE: int = 64
+
+    # Контроль допуска ко входу и регистрации: token bucket по IP и email (токенов в секунду и ёмкость)
+    # и лимит одновременных операций с паролями в процессе
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_IP_RATE: float = 1.0
+    ADMISSION_IP_BURST: int = 20
+    ADMISSION_EMAIL_RATE: float = 0.1
+    ADMISSION_EMAIL_BURST: int = 5
+    ADMISSION_MAX_PASSWORD_OPS: int = 32
+    ADMISSION_MAX_KEYS: int = 100_000
+    ADMISSION_SQLITE_PATH: str | None = None  # файл SQLite для общих корзин нескольких процессов
+    ADMISSION_SQLITE_TIMEOUT: float = 0.1  # ожидание блокировки файла корзин, секунды; дольше - запрос допускается
+
+    # Роль и версия токенов в access-токене: проверка прав через get_current_principal без обращения к БД
+    TOKEN_ROLE_CLAIMS: bool = False
+
+    # Срок жизни access-токена, минуты
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Интервал синхронизации отозванных токенов с БД между процессами, секунды (0 - только при старте)
+    TOKEN_REVOCATION_SYNC_INTERVAL: float = 30.0
+
+    # Интервал синхронизации версий токенов пользователей с БД, секунды (0 - только при старте)
+    TOKEN_VERSION_SYNC_INTERVAL: float = 30.0
+
+    # Интервал перезагрузки справочника ролей из БД, секунды (0 - только при старте и после изменений в процессе)
+    ROLE_REGISTRY_SYNC_INTERVAL: float = 60.0
+
+    # Кеш проверенных access-токенов
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_SIZE: int = 10_000
+
+    # Кеш записей DAO по первичному ключу
+    DAO_IDENTITY_CACHE_ENABLED: bool = True
+    USERS_CACHE_SIZE: int = 10_000
+    USERS_CACHE_TTL: float = 60.0
+
+    # Роли с административными правами
+    ADMIN_ROLE_NAMES: list[str] = ["Admin", "SuperAdmin"]
+
+    # Использовать ORJSONResponse как класс ответа по умолчанию, если установлен orjson
+    USE_ORJSON: bool = True
+
+    # Keyset-пагинация
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 500
+
+    # Размер пачки для массовых операций DAO
+    DAO_BULK_CHUNK_SIZE: int = 1000
+
+    # Аудит планов запросов DAO для разработки и CI: отчёт о полных сканированиях таблиц при остановке
+    DAO_QUERY_AUDIT: bool = False
+    DAO_QUERY_AUDIT_REPORT: str | None = None  # путь к JSON-отчёту
+
+    # Учёт запросов к БД в каждом запросе к API: порог медленного запроса (мс), число одинаковых запросов,
+    # считающееся N+1, и бюджет запросов; в строгом режиме (для тестов) запрос сверх бюджета завершается ошибкой
+    DAO_QUERY_TRACKING: bool = True
+    DAO_SLOW_QUERY_MS: float = 100.0
+    DAO_REPEATED_QUERY_THRESHOLD: int = 5
+    DAO_QUERY_BUDGET: int = 20
+    DAO_QUERY_BUDGET_STRICT: bool = False
+
+    # Пул соединений
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = False
+
+    # Движки для чтения: явные URL реплик или read-only пул к файлу SQLite
+    DB_READ_URLS: list[str] = []
+    SQLITE_READ_ENGINE: bool = True
+
+    # PRAGMA, применяемые к каждому новому соединению SQLite
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE: int = -64000  # отрицательное значение - размер в КиБ
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_BUSY_TIMEOUT: int = 5000  # мс
+    SQLITE_TEMP_STORE: str = "MEMORY"
+
     model_config = SettingsConfigDict(env_file=f"{BASE_DIR}/.env")
 
 
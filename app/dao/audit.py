@@ -0,0 +1,130 @@
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+
+# Префикс EXPLAIN и признак полного сканирования таблицы для поддерживаемых диалектов
+_EXPLAIN = {
+    'sqlite': ("EXPLAIN QUERY PLAN ", re.compile(r"^SCAN (?:TABLE )?(\w+)$")),
+    'postgresql': ("EXPLAIN ", re.compile(r"Seq Scan on (\w+)")),
+}
+
+
+@dataclass(slots=True)
+class FilterShape:
+    """Форма фильтра DAO: модель и набор ключей, с примером значений первого вызова."""
+    model: type
+    keys: tuple[str, ...]
+    null_keys: tuple[str, ...]
+    params: dict[str, Any]
+    operations: set[str] = field(default_factory=set)
+
+
+@dataclass(frozen=True, slots=True)
+class ScanFinding:
+    """Фильтр, для которого планировщик выбрал полное сканирование таблицы."""
+    table: str
+    columns: tuple[str, ...]
+    operations: tuple[str, ...]
+    plan: tuple[str, ...]
+
+    @property
+    def index_name(self) -> str:
+        return f"ix_{self.table}_{'_'.join(self.columns)}"
+
+    def create_index(self) -> str:
+        return f"op.create_index('{self.index_name}', '{self.table}', {list(self.columns)!r})"
+
+    def drop_index(self) -> str:
+        return f"op.drop_index('{self.index_name}', table_name='{self.table}')"
+
+
+def migration_ops(findings: list[ScanFinding]) -> str:
+    """Тела upgrade/downgrade для миграции Alembic с предложенными индексами."""
+    upgrade = "\n".join(f"    {finding.create_index()}" for finding in findings) or "    pass"
+    downgrade = "\n".join(f"    {finding.drop_index()}" for finding in reversed(findings)) or "    pass"
+    return f"def upgrade() -> None:\n{upgrade}\n\n\ndef downgrade() -> None:\n{downgrade}\n"
+
+
+class QueryPlanAuditor:
+    """
+    Аудит планов запросов BaseDAO для разработки и CI.
+
+    Запоминает каждую уникальную пару (модель, набор ключей фильтра), с которой работал DAO,
+    а по запросу выполняет для неё EXPLAIN и сообщает о полных сканированиях таблицы вместе
+    с предлагаемым индексом. Поддерживаются SQLite и PostgreSQL; на PostgreSQL результат
+    стоит проверять на данных, близких к боевым, так как на маленьких таблицах планировщик
+    предпочитает Seq Scan даже при наличии индекса.
+    """
+
+    def __init__(self, enabled: bool, report_path: str | None = None):
+        self.enabled = enabled
+        self.report_path = report_path
+        self._shapes: dict[tuple, FilterShape] = {}
+
+    def record(
+            self, model: type, operation: str, keys: tuple[str, ...], null_keys: tuple[str, ...], filter_dict: dict
+    ) -> None:
+        shape = self._shapes.get((model, keys, null_keys))
+        if shape is None:
+            shape = self._shapes[(model, keys, null_keys)] = FilterShape(
+                model=model, keys=keys, null_keys=null_keys, params={k: filter_dict[k] for k in keys})
+        shape.operations.add(operation)
+
+    @property
+    def shapes(self) -> list[FilterShape]:
+        return list(self._shapes.values())
+
+    async def analyze(self, engine: AsyncEngine) -> list[ScanFinding]:
+        """Выполняет EXPLAIN для всех записанных фильтров и возвращает найденные полные сканирования."""
+        dialect = engine.dialect.name
+        if dialect not in _EXPLAIN:
+            logger.warning(f"Аудит планов запросов не поддерживает диалект {dialect}")
+            return []
+        prefix, scan_pattern = _EXPLAIN[dialect]
+        findings = []
+        async with engine.connect() as conn:
+            for shape in self._shapes.values():
+                columns = shape.keys + shape.null_keys
+                if not columns:
+                    # Выборка без фильтра читает всю таблицу намеренно
+                    continue
+                conditions = [getattr(shape.model, k) == bindparam(f'f_{k}') for k in shape.keys]
+                conditions += [getattr(shape.model, k).is_(None) for k in shape.null_keys]
+                compiled = select(shape.model.id).where(*conditions).compile(dialect=conn.dialect)
+                values = compiled.construct_params({f'f_{k}': v for k, v in shape.params.items()})
+                params = tuple(values[name] for name in compiled.positiontup) if compiled.positional else values
+                result = await conn.exec_driver_sql(prefix + compiled.string, params)
+                plan = tuple(str(row[-1]) for row in result.all())
+                table = shape.model.__table__.name
+                if any(match.group(1) == table for match in map(scan_pattern.search, plan) if match):
+                    findings.append(ScanFinding(
+                        table=table, columns=columns, operations=tuple(sorted(shape.operations)), plan=plan))
+        return findings
+
+    async def report(self, engine: AsyncEngine) -> list[ScanFinding]:
+        """Логирует полные сканирования и, если задан путь, сохраняет отчёт с операциями миграции в JSON."""
+        findings = await self.analyze(engine)
+        for finding in findings:
+            logger.warning(
+                f"Полное сканирование {finding.table} по фильтру {list(finding.columns)} "
+                f"({', '.join(finding.operations)}), предлагаемый индекс: {finding.create_index()}"
+            )
+        logger.info(f"Аудит планов запросов: фильтров {len(self._shapes)}, полных сканирований {len(findings)}")
+        if self.report_path:
+            with open(self.report_path, 'w', encoding='utf-8') as file:
+                json.dump({
+                    'filters': len(self._shapes),
+                    'findings': [asdict(finding) for finding in findings],
+                    'migration': migration_ops(findings),
+                }, file, ensure_ascii=False, indent=2)
+        return findings
+
+
+query_auditor = QueryPlanAuditor(enabled=settings.DAO_QUERY_AUDIT, report_path=settings.DAO_QUERY_AUDIT_REPORT)
@@ -1,158 +1,714 @@
-from typing import List, TypeVar, Generic, Type
+import base64
+import functools
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Mapping, Sequence, TypeVar, Generic, Type
 from pydantic import BaseModel
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.future import select
-from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete, func
+from sqlalchemy import (
+    update as sqlalchemy_update, delete as sqlalchemy_delete, insert as sqlalchemy_insert, func, inspect, and_, or_,
+    bindparam
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
-from .database import Base
+from app.cache import TTLCache
+from app.config import settings
+from app.log import Redacted, sampled
+from app.metrics import reset_dao_method, set_dao_method
+from .audit import query_auditor
+from .database import Base, has_writes, on_commit
 
 T = TypeVar("T", bound=Base)
 
 
+def _detached_copy(instance: Base) -> Base:
+    """
+    Создаёт отсоединённую копию загруженного объекта вместе с загруженными связями "многие к одному".
+
+    Копия не принадлежит ни одной сессии, поэтому её можно хранить в кеше и безопасно
+    переносить в любую сессию через `merge(load=False)`.
+    """
+    state = inspect(instance)
+    mapper = state.mapper
+    values = {attr.key: state.dict[attr.key] for attr in mapper.column_attrs if attr.key in state.dict}
+    copy = mapper.class_(**values)
+    make_transient_to_detached(copy)
+    for relationship in mapper.relationships:
+        if relationship.uselist or relationship.key not in state.dict:
+            continue
+        related = state.dict[relationship.key]
+        set_committed_value(copy, relationship.key, _detached_copy(related) if related is not None else None)
+    return copy
+
+
+@dataclass
+class Page(Generic[T]):
+    """Страница результатов keyset-пагинации."""
+    items: List[T] | List[Row]
+    next_cursor: str | None
+
+
+def _encode_cursor(order_by: str, values: list[Any]) -> str:
+    payload = json.dumps([order_by, *values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> tuple[str, list[Any]]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        order_by, *values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Некорректный курсор пагинации") from e
+    return order_by, values
+
+
+# Типы значений курсора по типу колонки сортировки: значения должны пережить кодирование в JSON
+_CURSOR_VALUE_TYPES: dict[type, tuple[type, ...]] = {int: (int,), float: (int, float), str: (str,)}
+
+
+def _check_cursor_value(value: Any, types: tuple[type, ...]) -> None:
+    if isinstance(value, bool) or not isinstance(value, types):
+        raise ValueError("Некорректное значение в курсоре пагинации")
+
+
+def as_dict(data: BaseModel | Mapping[str, Any] | None) -> dict:
+    """
+    Приводит фильтры или значения к словарю.
+
+    Pydantic-модели сериализуются с exclude_unset=True, словари передаются как есть - это
+    быстрый путь для горячего кода, которому не нужна валидация.
+    """
+    if data is None:
+        return {}
+    if isinstance(data, BaseModel):
+        return data.model_dump(exclude_unset=True)
+    return data if isinstance(data, dict) else dict(data)
+
+
+# Параметризованные запросы, собранные один раз для (модель, операция, форма фильтра)
+_statement_cache: dict[tuple, Any] = {}
+
+
+def _filter_shape(filter_dict: dict) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Ключи фильтра, разделённые на сравнения по значению и проверки IS NULL."""
+    keys = tuple(sorted(k for k, v in filter_dict.items() if v is not None))
+    null_keys = tuple(sorted(k for k, v in filter_dict.items() if v is None)) if len(keys) != len(filter_dict) else ()
+    return keys, null_keys
+
+
+# Колонки нарушенного ограничения уникальности в текстах ошибок SQLite и PostgreSQL
+_UNIQUE_VIOLATION_PATTERNS = (
+    re.compile(r"UNIQUE constraint failed: ([\w., ]+)"),
+    re.compile(r"Key \(([^)]+)\)=\(.*\) already exists"),
+)
+
+
+class UniqueViolationError(Exception):
+    """Вставка нарушила ограничение уникальности; `columns` - колонки этого ограничения."""
+
+    def __init__(self, model_name: str, columns: frozenset[str]):
+        super().__init__(f"Нарушена уникальность {model_name}: {', '.join(sorted(columns))}")
+        self.columns = columns
+
+
+def _unique_violation_columns(error: IntegrityError) -> frozenset[str]:
+    """Колонки нарушенного ограничения уникальности или пустое множество для других нарушений целостности."""
+    message = str(error.orig)
+    for pattern in _UNIQUE_VIOLATION_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return frozenset(name.strip().rsplit('.', 1)[-1] for name in match.group(1).split(','))
+    return frozenset()
+
+
+def _chunks(items: list, size: int) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def instrumented(method):
+    """Помечает запросы к БД внутри метода именами класса DAO и метода для метрики db_query_duration_seconds."""
+    if not settings.METRICS_ENABLED:
+        return method
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        token = set_dao_method(type(self).__name__, name)
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            reset_dao_method(token)
+
+    return wrapper
+
+
 class BaseDAO(Generic[T]):
     model: Type[T] = None
 
+    # Кеш записей по первичному ключу, включается в дочернем классе заданием размера
+    identity_cache_size: int = 0
+    identity_cache_ttl: float | None = None
+    _identity_cache: TTLCache | None = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.identity_cache_size and settings.DAO_IDENTITY_CACHE_ENABLED:
+            cls._identity_cache = TTLCache(maxsize=cls.identity_cache_size, ttl=cls.identity_cache_ttl)
+        else:
+            cls._identity_cache = None
+
     def __init__(self, session: AsyncSession):
         self._session = session
         if self.model is None:
             raise ValueError("Модель должна быть указана в дочернем классе")
 
+    @classmethod
+    def cache_stats(cls) -> dict | None:
+        """Статистика кеша записей по первичному ключу или None, если кеш выключен."""
+        return cls._identity_cache.stats() if cls._identity_cache is not None else None
+
+    def _invalidate(self, filter_dict: dict) -> None:
+        """
+        Сбрасывает кеш для записей, затронутых изменением по фильтру.
+
+        Сброс выполняется сразу и повторно после фиксации транзакции: до неё другие сессии
+        могут снова положить в кеш прежние зафиксированные значения.
+        """
+        cache = self._identity_cache
+        if cache is None:
+            return
+        if 'id' in filter_dict:
+            data_id = filter_dict['id']
+            cache.pop(data_id)
+            on_commit(self._session, lambda: cache.pop(data_id))
+        else:
+            cache.clear()
+            on_commit(self._session, cache.clear)
+
+    async def _after_write(self) -> None:
+        """Хук, вызываемый после успешного изменения данных; переопределяется в дочерних классах."""
+
+    def _columns(self, columns: Sequence[str] | None) -> tuple[str, ...] | None:
+        """Проверяет имена колонок проекции и приводит их к кортежу, пригодному для ключа кеша запросов."""
+        if columns is None:
+            return None
+        columns = tuple(columns)
+        table_columns = self.model.__table__.c
+        unknown = [name for name in columns if name not in table_columns]
+        if not columns or unknown:
+            raise ValueError(f"Некорректные колонки проекции {self.model.__name__}: {unknown or columns}")
+        return columns
+
+    def _cursor_value_types(self, order_by: str) -> tuple[type, ...]:
+        """Допустимые типы значения колонки сортировки в курсоре; ValueError для неподдерживаемой колонки."""
+        column = self.model.__table__.c.get(order_by)
+        try:
+            python_type = column.type.python_type if column is not None else None
+        except NotImplementedError:
+            python_type = None
+        types = _CURSOR_VALUE_TYPES.get(python_type)
+        if types is None or column.nullable:
+            raise ValueError(
+                f"Сортировка {self.model.__name__} по колонке {order_by} не поддерживается: "
+                f"нужна колонка NOT NULL с числовыми или строковыми значениями")
+        return types
+
+    def _select(self, columns: tuple[str, ...] | None):
+        """SELECT полных объектов модели или только указанных колонок."""
+        if columns is None:
+            return select(self.model)
+        return select(*(getattr(self.model, name) for name in columns))
+
+    def _statement(self, operation: Any, filter_dict: dict, build: Callable[[list], Any]):
+        """
+        Возвращает закешированный запрос и параметры для фильтра.
+
+        Запрос строится функцией `build` из списка условий WHERE с bindparam один раз для каждой
+        комбинации модели, операции и набора ключей фильтра, затем переиспользуется с новыми значениями.
+        """
+        keys, null_keys = _filter_shape(filter_dict)
+        if query_auditor.enabled:
+            query_auditor.record(
+                self.model, operation[0] if isinstance(operation, tuple) else operation, keys, null_keys, filter_dict)
+        cache_key = (self.model, operation, keys, null_keys)
+        stmt = _statement_cache.get(cache_key)
+        if stmt is None:
+            conditions = [getattr(self.model, k) == bindparam(f'f_{k}') for k in keys]
+            conditions += [getattr(self.model, k).is_(None) for k in null_keys]
+            stmt = _statement_cache[cache_key] = build(conditions)
+        return stmt, {f'f_{k}': filter_dict[k] for k in keys}
+
+    @instrumented
     async def find_one_or_none_by_id(self, data_id: int):
+        # Сессия с записями в текущей транзакции видит данные, которых нет в кеше, и не должна в него их класть
+        cache = self._identity_cache if not has_writes(self._session) else None
+        if cache is not None:
+            cached = cache.get(data_id)
+            if cached is not None:
+                if sampled("dao.find_by_id"):
+                    logger.debug(
+                        "Запись {model} с ID {data_id} найдена в кеше.", model=self.model.__name__, data_id=data_id)
+                # Объект, уже загруженный в сессию, возвращается как есть: merge перезаписал бы его изменения
+                loaded = self._session.identity_map.get(identity_key(self.model, data_id))
+                if loaded is not None:
+                    return loaded
+                return await self._session.merge(cached, load=False)
         try:
-            query = select(self.model).filter_by(id=data_id)
-            result = await self._session.execute(query)
+            query, params = self._statement(
+                ('find', None), {'id': data_id}, lambda where: select(self.model).where(*where))
+            result = await self._session.execute(query, params)
             record = result.scalar_one_or_none()
-            log_message = f"Запись {self.model.__name__} с ID {data_id} {'найдена' if record else 'не найдена'}."
-            logger.info(log_message)
+            if sampled("dao.find_by_id"):
+                logger.debug(
+                    "Запись {model} с ID {data_id} {status}.",
+                    model=self.model.__name__, data_id=data_id, status='найдена' if record else 'не найдена')
+            if cache is not None and record is not None:
+                cache.set(data_id, _detached_copy(record))
             return record
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске записи с ID {data_id}: {e}")
+            logger.error("Ошибка при поиске записи с ID {data_id}: {error}", data_id=data_id, error=e)
             raise
 
-    async def find_one_or_none(self, filters: BaseModel):
-        filter_dict = filters.model_dump(exclude_unset=True)
-        logger.info(f"Поиск одной записи {self.model.__name__} по фильтрам: {filter_dict}")
+    @instrumented
+    async def find_one_or_none(
+            self, filters: BaseModel | dict | None = None, columns: Sequence[str] | None = None, **filter_kwargs
+    ):
+        """
+        Ищет одну запись по фильтрам.
+
+        С `columns` выбираются только указанные колонки и возвращается Row (или None): строка
+        только для чтения, которая не попадает в identity map сессии.
+        """
+        columns = self._columns(columns)
+        filter_dict = as_dict(filters)
+        if filter_kwargs:
+            filter_dict = {**filter_dict, **filter_kwargs}
+        logger.debug(
+            "Поиск одной записи {model} по фильтрам: {filters}",
+            model=self.model.__name__, filters=Redacted(filter_dict))
         try:
-            query = select(self.model).filter_by(**filter_dict)
-            result = await self._session.execute(query)
-            record = result.scalar_one_or_none()
-            log_message = f"Запись {'найдена' if record else 'не найдена'} по фильтрам: {filter_dict}"
-            logger.info(log_message)
+            query, params = self._statement(
+                ('find', columns), filter_dict, lambda where: self._select(columns).where(*where))
+            result = await self._session.execute(query, params)
+            record = result.scalar_one_or_none() if columns is None else result.one_or_none()
+            if sampled("dao.find_one"):
+                logger.debug(
+                    "Запись {status} по фильтрам: {filters}",
+                    status='найдена' if record else 'не найдена', filters=Redacted(filter_dict))
             return record
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске записи по фильтрам {filter_dict}: {e}")
+            logger.error(
+                "Ошибка при поиске записи по фильтрам {filters}: {error}", filters=Redacted(filter_dict), error=e)
             raise
 
-    async def find_all(self, filters: BaseModel | None = None):
-        filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
-        logger.info(f"Поиск всех записей {self.model.__name__} по фильтрам: {filter_dict}")
+    @instrumented
+    async def find_all(
+            self, filters: BaseModel | dict | None = None, columns: Sequence[str] | None = None, **filter_kwargs
+    ):
+        """
+        Ищет все записи по фильтрам.
+
+        С `columns` возвращается список Row только с указанными колонками. Строки не отслеживаются
+        сессией и не содержат лишних полей, поэтому большие выборки для чтения занимают заметно
+        меньше памяти и процессорного времени, чем полные ORM-объекты.
+        """
+        columns = self._columns(columns)
+        filter_dict = as_dict(filters)
+        if filter_kwargs:
+            filter_dict = {**filter_dict, **filter_kwargs}
+        logger.debug(
+            "Поиск всех записей {model} по фильтрам: {filters}",
+            model=self.model.__name__, filters=Redacted(filter_dict))
         try:
-            query = select(self.model).filter_by(**filter_dict)
-            result = await self._session.execute(query)
-            records = result.scalars().all()
-            logger.info(f"Найдено {len(records)} записей.")
+            query, params = self._statement(
+                ('find', columns), filter_dict, lambda where: self._select(columns).where(*where))
+            result = await self._session.execute(query, params)
+            records = result.scalars().all() if columns is None else result.all()
+            logger.debug("Найдено {count} записей.", count=len(records))
             return records
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске всех записей по фильтрам {filter_dict}: {e}")
+            logger.error(
+                "Ошибка при поиске всех записей по фильтрам {filters}: {error}", filters=Redacted(filter_dict), error=e)
+            raise
+
+    @instrumented
+    async def exists(self, filters: BaseModel | dict | None = None, **filter_kwargs) -> bool:
+        """Проверяет наличие записи по фильтрам запросом SELECT EXISTS без загрузки строки."""
+        filter_dict = as_dict(filters)
+        if filter_kwargs:
+            filter_dict = {**filter_dict, **filter_kwargs}
+        logger.debug(
+            "Проверка существования записи {model} по фильтрам: {filters}",
+            model=self.model.__name__, filters=Redacted(filter_dict))
+        try:
+            query, params = self._statement(
+                'exists', filter_dict, lambda where: select(select(self.model.id).where(*where).limit(1).exists()))
+            result = await self._session.execute(query, params)
+            return bool(result.scalar())
+        except SQLAlchemyError as e:
+            logger.error(
+                "Ошибка при проверке существования записи по фильтрам {filters}: {error}",
+                filters=Redacted(filter_dict), error=e)
+            raise
+
+    @instrumented
+    async def find_page(
+            self,
+            filters: BaseModel | dict | None = None,
+            limit: int = settings.PAGE_SIZE_DEFAULT,
+            cursor: str | None = None,
+            order_by: str = 'id',
+            columns: Sequence[str] | None = None
+    ) -> Page[T]:
+        """
+        Keyset-пагинация: выбирает записи после позиции курсора в порядке (order_by, id).
+
+        Стоимость запроса не зависит от глубины чтения, так как вместо OFFSET используется
+        условие по последнему ключу предыдущей страницы. Для order_by следует выбирать
+        индексированную колонку с числовыми или строковыми значениями (например, id или email);
+        для других колонок, а также для курсора с неподходящими значениями выбрасывается ValueError.
+
+        Args:
+            filters: Фильтры выборки
+            limit: Размер страницы, не больше PAGE_SIZE_MAX
+            cursor: Курсор из `next_cursor` предыдущей страницы
+            order_by: Колонка сортировки
+            columns: Колонки проекции; если заданы, страница состоит из Row только для чтения
+                (id и колонка сортировки добавляются автоматически, они нужны для курсора)
+
+        Returns:
+            Page: Записи страницы и курсор следующей страницы (None на последней странице)
+        """
+        value_types = self._cursor_value_types(order_by)
+        columns = self._columns(columns)
+        if columns is not None:
+            columns += tuple(name for name in dict.fromkeys(('id', order_by)) if name not in columns)
+        filter_dict = as_dict(filters)
+        limit = max(1, min(limit, settings.PAGE_SIZE_MAX))
+        pk = self.model.id
+        column = getattr(self.model, order_by)
+        logger.debug(
+            "Поиск страницы {model} по фильтрам: {filters}, limit={limit}",
+            model=self.model.__name__, filters=Redacted(filter_dict), limit=limit)
+
+        if query_auditor.enabled:
+            query_auditor.record(self.model, 'page', *_filter_shape(filter_dict), filter_dict)
+        query = self._select(columns).filter_by(**filter_dict)
+        if cursor:
+            cursor_order_by, values = _decode_cursor(cursor)
+            if cursor_order_by != order_by or len(values) != (1 if order_by == 'id' else 2):
+                raise ValueError("Курсор не соответствует сортировке")
+            _check_cursor_value(values[-1], (int,))
+            if order_by == 'id':
+                query = query.where(pk > values[0])
+            else:
+                last_value, last_id = values
+                _check_cursor_value(last_value, value_types)
+                query = query.where(or_(column > last_value, and_(column == last_value, pk > last_id)))
+        query = query.order_by(column, pk) if order_by != 'id' else query.order_by(pk)
+
+        try:
+            result = await self._session.execute(query.limit(limit + 1))
+            records = list(result.scalars().all() if columns is None else result.all())
+        except SQLAlchemyError as e:
+            logger.error(
+                "Ошибка при поиске страницы записей по фильтрам {filters}: {error}",
+                filters=Redacted(filter_dict), error=e)
             raise
 
-    async def add(self, values: BaseModel):
-        values_dict = values.model_dump(exclude_unset=True)
-        logger.info(f"Добавление записи {self.model.__name__} с параметрами: {values_dict}")
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            values = [last.id] if order_by == 'id' else [getattr(last, order_by), last.id]
+            next_cursor = _encode_cursor(order_by, values)
+        logger.debug("Найдено {count} записей на странице.", count=len(records))
+        return Page(items=records, next_cursor=next_cursor)
+
+    @instrumented
+    async def add(self, values: BaseModel | dict):
+        values_dict = as_dict(values)
+        logger.debug(
+            "Добавление записи {model} с параметрами: {values}",
+            model=self.model.__name__, values=Redacted(values_dict))
         try:
             new_instance = self.model(**values_dict)
             self._session.add(new_instance)
-            logger.info(f"Запись {self.model.__name__} успешно добавлена.")
+            logger.debug("Запись {model} успешно добавлена.", model=self.model.__name__)
             await self._session.flush()
+            await self._after_write()
             return new_instance
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при добавлении записи: {e}")
+            logger.error("Ошибка при добавлении записи: {error}", error=e)
             raise
 
-    async def add_many(self, instances: List[BaseModel]):
-        values_list = [item.model_dump(exclude_unset=True) for item in instances]
-        logger.info(f"Добавление нескольких записей {self.model.__name__}. Количество: {len(values_list)}")
+    @instrumented
+    async def insert(self, values: BaseModel | dict) -> int:
+        """
+        Оптимистичная вставка одной записи без предварительной проверки и без загрузки объекта.
+
+        Выполняет INSERT ... RETURNING id и возвращает ID новой записи. Если вставка нарушает
+        ограничение уникальности, выбрасывается UniqueViolationError с колонками ограничения;
+        транзакцию после этого следует откатить.
+        """
+        values_dict = as_dict(values)
+        logger.debug(
+            "Вставка записи {model} с параметрами: {values}", model=self.model.__name__, values=Redacted(values_dict))
+        table = self.model.__table__
+        query = _statement_cache.get((self.model, 'insert'))
+        if query is None:
+            query = _statement_cache[(self.model, 'insert')] = sqlalchemy_insert(table).returning(table.c.id)
         try:
-            new_instances = [self.model(**values) for values in values_list]
-            self._session.add_all(new_instances)
-            logger.info(f"Успешно добавлено {len(new_instances)} записей.")
-            await self._session.flush()
+            result = await self._session.execute(query, values_dict)
+            new_id = result.scalar_one()
+        except IntegrityError as e:
+            columns = _unique_violation_columns(e)
+            if not columns:
+                logger.error("Ошибка при вставке записи: {error}", error=e)
+                raise
+            logger.debug(
+                "Запись {model} не добавлена: нарушена уникальность {columns}",
+                model=self.model.__name__, columns=sorted(columns))
+            raise UniqueViolationError(self.model.__name__, columns) from e
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при вставке записи: {error}", error=e)
+            raise
+        logger.debug("Запись {model} с ID {new_id} добавлена.", model=self.model.__name__, new_id=new_id)
+        await self._after_write()
+        return new_id
+
+    @instrumented
+    async def add_many(self, instances: List[BaseModel | dict]):
+        """
+        Массовая вставка записей пачками по DAO_BULK_CHUNK_SIZE.
+
+        Если диалект поддерживает RETURNING для executemany, каждая пачка вставляется одним
+        INSERT ... RETURNING, иначе записи добавляются через unit of work сессии.
+        """
+        values_list = [as_dict(item) for item in instances]
+        logger.debug(
+            "Добавление нескольких записей {model}. Количество: {count}",
+            model=self.model.__name__, count=len(values_list))
+        try:
+            if not self._session.get_bind().dialect.insert_executemany_returning:
+                new_instances = [self.model(**values) for values in values_list]
+                self._session.add_all(new_instances)
+                await self._session.flush()
+            else:
+                new_instances = []
+                query = sqlalchemy_insert(self.model).returning(self.model, sort_by_parameter_order=True)
+                for number, chunk in enumerate(_chunks(values_list, settings.DAO_BULK_CHUNK_SIZE), start=1):
+                    started = time.perf_counter()
+                    result = await self._session.scalars(query, chunk)
+                    new_instances.extend(result.all())
+                    logger.debug(
+                        "Пачка {number}: добавлено {count} записей за {elapsed_ms:.1f} мс",
+                        number=number, count=len(chunk), elapsed_ms=(time.perf_counter() - started) * 1000)
+            logger.debug("Успешно добавлено {count} записей.", count=len(new_instances))
+            await self._after_write()
             return new_instances
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при добавлении нескольких записей: {e}")
+            logger.error("Ошибка при добавлении нескольких записей: {error}", error=e)
             raise
 
-    async def update(self, filters: BaseModel, values: BaseModel):
-        filter_dict = filters.model_dump(exclude_unset=True)
-        values_dict = values.model_dump(exclude_unset=True)
-        logger.info(
-            f"Обновление записей {self.model.__name__} по фильтру: {filter_dict} с параметрами: {values_dict}")
+    def _upsert_insert(self):
+        """Возвращает конструктор INSERT с поддержкой ON CONFLICT для текущего диалекта."""
+        dialect = self._session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            return sqlite.insert
+        if dialect == 'postgresql':
+            return postgresql.insert
+        raise NotImplementedError(f"Upsert не поддерживается для диалекта {dialect}")
+
+    @instrumented
+    async def upsert_many(self, values: List[BaseModel | dict], conflict_column: str) -> List[int]:
+        """
+        Вставляет записи или обновляет существующие по уникальной колонке (INSERT ... ON CONFLICT DO UPDATE).
+
+        Записи группируются по набору переданных полей и отправляются пачками по DAO_BULK_CHUNK_SIZE,
+        по одному запросу на пачку.
+
+        Args:
+            values: Данные записей
+            conflict_column: Уникальная колонка, по которой определяется существующая запись (например, email)
+
+        Returns:
+            List[int]: ID вставленных и обновлённых записей
+        """
+        table = self.model.__table__
+        column = table.c[conflict_column]
+        if not (column.unique or column.primary_key):
+            raise ValueError(f"Колонка {conflict_column} не является уникальной")
+
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for item in values:
+            item_dict = as_dict(item)
+            if conflict_column not in item_dict:
+                raise ValueError(f"Для upsert требуется значение {conflict_column}")
+            groups.setdefault(tuple(sorted(item_dict)), []).append(item_dict)
+
+        logger.debug(
+            "Upsert записей {model} по колонке {column}. Количество: {count}",
+            model=self.model.__name__, column=conflict_column, count=len(values))
+        insert = self._upsert_insert()
         try:
-            query = (
-                sqlalchemy_update(self.model)
-                .where(*[getattr(self.model, k) == v for k, v in filter_dict.items()])
-                .values(**values_dict)
-                .execution_options(synchronize_session="fetch")
+            ids: List[int] = []
+            for keys, items in groups.items():
+                for number, chunk in enumerate(_chunks(items, settings.DAO_BULK_CHUNK_SIZE), start=1):
+                    started = time.perf_counter()
+                    stmt = insert(table).values(chunk)
+                    update_values = {
+                        k: stmt.excluded[k] for k in keys if k not in (conflict_column, 'id', 'created_at')
+                    }
+                    if update_values and 'updated_at' in table.c:
+                        update_values['updated_at'] = func.now()
+                    # Пустой SET заменяем на присваивание ключа самому себе, чтобы RETURNING вернул ID
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[column],
+                        set_=update_values or {conflict_column: stmt.excluded[conflict_column]}
+                    ).returning(table.c.id)
+                    result = await self._session.execute(stmt)
+                    chunk_ids = list(result.scalars().all())
+                    ids.extend(chunk_ids)
+                    logger.debug(
+                        "Пачка {number}: upsert {count} записей за {elapsed_ms:.1f} мс",
+                        number=number, count=len(chunk_ids), elapsed_ms=(time.perf_counter() - started) * 1000)
+            for data_id in ids:
+                self._invalidate({'id': data_id})
+            await self._after_write()
+            return ids
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при upsert записей: {error}", error=e)
+            raise
+
+    @instrumented
+    async def upsert(self, values: BaseModel | dict, conflict_column: str) -> int:
+        """Вставляет запись или обновляет существующую по уникальной колонке и возвращает её ID."""
+        ids = await self.upsert_many([values], conflict_column)
+        return ids[0]
+
+    @instrumented
+    async def update(self, filters: BaseModel | dict, values: BaseModel | dict):
+        filter_dict = as_dict(filters)
+        values_dict = as_dict(values)
+        logger.debug(
+            "Обновление записей {model} по фильтру: {filters} с параметрами: {values}",
+            model=self.model.__name__, filters=Redacted(filter_dict), values=Redacted(values_dict))
+        try:
+            # Значения подставляются на каждый вызов: стратегия "fetch" переносит их в объекты сессии
+            query, params = self._statement(
+                'update', filter_dict,
+                lambda where: (
+                    sqlalchemy_update(self.model).where(*where).execution_options(synchronize_session="fetch")
+                )
             )
-            result = await self._session.execute(query)
-            logger.info(f"Обновлено {result.rowcount} записей.")
+            result = await self._session.execute(query.values(**values_dict), params)
+            self._invalidate(filter_dict)
+            logger.debug("Обновлено {count} записей.", count=result.rowcount)
             await self._session.flush()
+            await self._after_write()
             return result.rowcount
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при обновлении записей: {e}")
+            logger.error("Ошибка при обновлении записей: {error}", error=e)
             raise
 
-    async def delete(self, filters: BaseModel):
-        filter_dict = filters.model_dump(exclude_unset=True)
-        logger.info(f"Удаление записей {self.model.__name__} по фильтру: {filter_dict}")
+    @instrumented
+    async def delete(self, filters: BaseModel | dict):
+        filter_dict = as_dict(filters)
+        logger.debug(
+            "Удаление записей {model} по фильтру: {filters}", model=self.model.__name__, filters=Redacted(filter_dict))
         if not filter_dict:
             logger.error("Нужен хотя бы один фильтр для удаления.")
             raise ValueError("Нужен хотя бы один фильтр для удаления.")
         try:
-            query = sqlalchemy_delete(self.model).filter_by(**filter_dict)
-            result = await self._session.execute(query)
-            logger.info(f"Удалено {result.rowcount} записей.")
+            query, params = self._statement(
+                'delete', filter_dict,
+                lambda where: sqlalchemy_delete(self.model).where(*where).execution_options(synchronize_session="fetch")
+            )
+            result = await self._session.execute(query, params)
+            self._invalidate(filter_dict)
+            logger.debug("Удалено {count} записей.", count=result.rowcount)
             await self._session.flush()
+            await self._after_write()
             return result.rowcount
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при удалении записей: {e}")
+            logger.error("Ошибка при удалении записей: {error}", error=e)
             raise
 
-    async def count(self, filters: BaseModel | None = None):
-        filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
-        logger.info(f"Подсчет количества записей {self.model.__name__} по фильтру: {filter_dict}")
+    @instrumented
+    async def count(self, filters: BaseModel | dict | None = None, **filter_kwargs):
+        filter_dict = as_dict(filters)
+        if filter_kwargs:
+            filter_dict = {**filter_dict, **filter_kwargs}
+        logger.debug(
+            "Подсчет количества записей {model} по фильтру: {filters}",
+            model=self.model.__name__, filters=Redacted(filter_dict))
         try:
-            query = select(func.count(self.model.id)).filter_by(**filter_dict)
-            result = await self._session.execute(query)
+            query, params = self._statement(
+                'count', filter_dict, lambda where: select(func.count(self.model.id)).where(*where))
+            result = await self._session.execute(query, params)
             count = result.scalar()
-            logger.info(f"Найдено {count} записей.")
+            logger.debug("Найдено {count} записей.", count=count)
             return count
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при подсчете записей: {e}")
+            logger.error("Ошибка при подсчете записей: {error}", error=e)
             raise
 
-    async def bulk_update(self, records: List[BaseModel]):
-        logger.info(f"Массовое обновление записей {self.model.__name__}")
+    @instrumented
+    async def bulk_update(self, records: List[BaseModel | dict]):
+        """
+        Массовое обновление записей по id через executemany.
+
+        Записи группируются по набору обновляемых полей; для каждой группы выполняется один
+        UPDATE ... WHERE id = :id пачками по DAO_BULK_CHUNK_SIZE. Объекты, уже загруженные
+        в сессию, не синхронизируются с новыми значениями.
+        """
+        logger.debug("Массовое обновление записей {model}", model=self.model.__name__)
+        table = self.model.__table__
+        groups: dict[tuple[str, ...], list[dict]] = {}
+        for record in records:
+            record_dict = as_dict(record)
+            if 'id' not in record_dict:
+                continue
+            keys = tuple(sorted(k for k in record_dict if k != 'id'))
+            if not keys:
+                continue
+            params = {f'b_{k}': record_dict[k] for k in keys}
+            params['b_id'] = record_dict['id']
+            groups.setdefault(keys, []).append(params)
+
         try:
             updated_count = 0
-            for record in records:
-                record_dict = record.model_dump(exclude_unset=True)
-                if 'id' not in record_dict:
-                    continue
-
-                update_data = {k: v for k, v in record_dict.items() if k != 'id'}
+            for keys, params_list in groups.items():
                 stmt = (
-                    sqlalchemy_update(self.model)
-                    .filter_by(id=record_dict['id'])
-                    .values(**update_data)
+                    sqlalchemy_update(table)
+                    .where(table.c.id == bindparam('b_id'))
+                    .values({k: bindparam(f'b_{k}') for k in keys})
                 )
-                result = await self._session.execute(stmt)
-                updated_count += result.rowcount
+                for number, chunk in enumerate(_chunks(params_list, settings.DAO_BULK_CHUNK_SIZE), start=1):
+                    started = time.perf_counter()
+                    result = await self._session.execute(stmt, chunk)
+                    updated_count += result.rowcount
+                    logger.debug(
+                        "Пачка {number} ({fields}): обновлено {count} записей за {elapsed_ms:.1f} мс",
+                        number=number, fields=', '.join(keys), count=result.rowcount,
+                        elapsed_ms=(time.perf_counter() - started) * 1000)
+                for params in params_list:
+                    self._invalidate({'id': params['b_id']})
 
-            logger.info(f"Обновлено {updated_count} записей")
+            logger.debug("Обновлено {count} записей", count=updated_count)
             await self._session.flush()
+            await self._after_write()
             return updated_count
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при массовом обновлении: {e}")
+            logger.error("Ошибка при массовом обновлении: {error}", error=e)
             raise
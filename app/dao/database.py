@@ -1,18 +1,245 @@
+import itertools
+import time
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import Annotated
-from sqlalchemy import func, TIMESTAMP, Integer, inspect
-from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, declared_attr
-from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine, AsyncSession
-from app.config import database_url
+from typing import Annotated, Any, Callable, ClassVar, Iterable, Iterator
+from loguru import logger
+from sqlalchemy import func, TIMESTAMP, Integer, inspect, event, make_url, text
+from sqlalchemy.engine import URL
+from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, declared_attr, Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncEngine, async_sessionmaker, create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app import metrics, timing
+from app.config import database_url, settings
+from app.dao.tracking import query_tracker
 
 
-engine = create_async_engine(url=database_url)
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.database in (None, '', ':memory:') or 'mode=memory' in str(url)
+
+
+def engine_options(url: URL) -> dict:
+    """Параметры пула соединений для create_async_engine."""
+    if url.get_backend_name() == 'sqlite':
+        if _is_sqlite_memory(url):
+            # Для БД в памяти используется StaticPool с единственным соединением
+            return {}
+        # Драйвер aiosqlite по умолчанию открывает новое соединение на каждую сессию (NullPool)
+        options = {"poolclass": AsyncAdaptedQueuePool}
+    else:
+        options = {}
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+    }
+
+
+def _sqlite_pragmas_listener(read_only: bool):
+    """Возвращает обработчик, применяющий PRAGMA к каждому новому соединению SQLite."""
+    pragmas = sqlite_pragmas()
+    if read_only:
+        # Режим журнала задаёт пишущее соединение
+        pragmas.pop("journal_mode")
+
+    def apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return apply_pragmas
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if settings.DAO_QUERY_TRACKING:
+        query_tracker.count(statement)
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Длительность измеряется один раз для Server-Timing, метрик и журнала медленных запросов
+    elapsed = time.perf_counter() - context._query_started
+    if settings.SERVER_TIMING_ENABLED:
+        timing.observe_query(elapsed)
+    if settings.METRICS_ENABLED:
+        metrics.observe_query(elapsed)
+    if settings.DAO_QUERY_TRACKING:
+        query_tracker.observe(elapsed, statement, parameters, context, executemany)
+
+
+def create_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    new_engine = create_async_engine(url=url, **engine_options(make_url(url)))
+    if new_engine.dialect.name == 'sqlite':
+        event.listen(new_engine.sync_engine, "connect", _sqlite_pragmas_listener(read_only))
+    if settings.SERVER_TIMING_ENABLED or settings.METRICS_ENABLED or settings.DAO_QUERY_TRACKING:
+        event.listen(new_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(new_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    return new_engine
+
+
+def read_urls(url: str) -> list[str]:
+    """URL движков для чтения: явно заданные реплики или read-only подключение к файлу SQLite."""
+    if settings.DB_READ_URLS:
+        return list(settings.DB_READ_URLS)
+    parsed = make_url(url)
+    if settings.SQLITE_READ_ENGINE and parsed.get_backend_name() == 'sqlite' and not _is_sqlite_memory(parsed):
+        return [f"{parsed.drivername}:///file:{parsed.database}?mode=ro&uri=true"]
+    return []
+
+
+async def log_engine_settings(target: AsyncEngine) -> None:
+    """Выводит в лог фактические настройки пула и PRAGMA соединения."""
+    pool = target.pool
+    logger.info(f"Пул соединений {target.url.render_as_string(hide_password=True)}: {pool.status()}")
+    if target.dialect.name != 'sqlite':
+        return
+    async with target.connect() as conn:
+        effective = {}
+        for name in sqlite_pragmas():
+            effective[name] = (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+    logger.info(f"PRAGMA SQLite: {effective}")
+
+
+engine = create_engine(database_url)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+# Движки для чтения; при их отсутствии чтение идёт через основной движок
+read_engines = [create_engine(url, read_only=True) for url in read_urls(database_url)]
+_read_engines_cycle = itertools.cycle(read_engines or [engine])
+
+
+def _pool_gauge(read: Callable[[QueuePool], int]) -> Callable[[], Iterator[tuple[tuple, int]]]:
+    """Функция сбора gauge по пулам всех движков; пулы без очереди (StaticPool, NullPool) пропускаются."""
+
+    def collect() -> Iterator[tuple[tuple, int]]:
+        for name, target in [("primary", engine), *((f"read{i}", e) for i, e in enumerate(read_engines))]:
+            if isinstance(target.pool, QueuePool):
+                yield (name,), read(target.pool)
+
+    return collect
+
+
+metrics.registry.register(metrics.GaugeCallback(
+    "db_pool_checked_out", "Соединения, выданные из пула", ("engine",), _pool_gauge(QueuePool.checkedout)))
+metrics.registry.register(metrics.GaugeCallback(
+    "db_pool_overflow", "Соединения сверх pool_size (отрицательное - ещё не созданные соединения пула)", ("engine",),
+    _pool_gauge(QueuePool.overflow)))
+metrics.registry.register(metrics.GaugeCallback(
+    "db_pool_size", "Размер пула соединений", ("engine",), _pool_gauge(QueuePool.size)))
+
+
+class RoutingSession(Session):
+    """
+    Сессия, выбирающая движок при каждом обращении к БД.
+
+    Запись (flush, INSERT/UPDATE/DELETE) и все обращения после неё идут в основной движок, как и
+    чтения сессии, помеченной `info['primary']`. Остальные чтения идут в один движок для чтения,
+    закреплённый за сессией при первом чтении. Соединение берётся из пула только при первом
+    запросе к БД.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get('primary') or self._flushing or isinstance(clause, UpdateBase):
+            self.info['primary'] = True
+            return engine.sync_engine
+        read_engine = self.info.get('read_engine')
+        if read_engine is None:
+            read_engine = self.info['read_engine'] = next(_read_engines_cycle)
+        return read_engine.sync_engine
+
+
+# Сессии запросов: одна на запрос, общая для всех зависимостей
+request_session_maker = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    session.info.pop('writes', None)
+    for callback in session.info.pop('on_commit', ()):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_commit_callbacks(session: Session) -> None:
+    session.info.pop('writes', None)
+    session.info.pop('on_commit', None)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_writes(session: Session, flush_context) -> None:
+    session.info['writes'] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_writes(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['writes'] = True
+
+
+def has_writes(session: AsyncSession) -> bool:
+    """Есть ли в сессии несохранённые изменения или незафиксированные записи текущей транзакции."""
+    return bool(session.info.get('writes') or session.new or session.dirty or session.deleted)
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Выполняет `callback` после фиксации текущей транзакции сессии; при откате он отбрасывается.
+
+    Используется для обновления состояния в памяти процесса (справочники, версии токенов),
+    которое не должно опережать данные, видимые в БД.
+    """
+    session.info.setdefault('on_commit', []).append(callback)
+
+
 str_uniq = Annotated[str, mapped_column(unique=True, nullable=False)]
 
 
+def _convert_value(value: Any) -> Any:
+    """Преобразование значения колонки, тип которой не позволяет выбрать конвертер заранее."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _column_converter(column) -> Callable[[Any], Any] | None:
+    """Подбирает конвертер значения по типу колонки; None - значение не требует преобразования."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return _convert_value
+    if issubclass(python_type, datetime):
+        return datetime.isoformat
+    if issubclass(python_type, Decimal):
+        return float
+    if issubclass(python_type, uuid.UUID):
+        return str
+    return None
+
+
 class Base(AsyncAttrs, DeclarativeBase):
     __abstract__ = True
 
@@ -24,10 +251,21 @@ class Base(AsyncAttrs, DeclarativeBase):
         onupdate=func.now()
     )
 
+    # План сериализации: пары (атрибут, конвертер), собираются один раз при создании модели
+    _serialization_plan: ClassVar[tuple[tuple[str, Callable[[Any], Any] | None], ...]] = ()
+
     @declared_attr
     def __tablename__(cls) -> str:
         return cls.__name__.lower() + 's'
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get('__abstract__', False):
+            return
+        cls._serialization_plan = tuple(
+            (column.key, _column_converter(column)) for column in inspect(cls).columns
+        )
+
     def to_dict(self, exclude_none: bool = False):
         """
         Преобразует объект модели в словарь.
@@ -38,24 +276,31 @@ class Base(AsyncAttrs, DeclarativeBase):
         Returns:
             dict: Словарь с данными объекта
         """
+        state = self.__dict__
         result = {}
-        for column in inspect(self.__class__).columns:
-            value = getattr(self, column.key)
-
-            # Преобразование специальных типов данных
-            if isinstance(value, datetime):
-                value = value.isoformat()
-            elif isinstance(value, Decimal):
-                value = float(value)
-            elif isinstance(value, uuid.UUID):
-                value = str(value)
-
-            # Добавляем значение в результат
+        for key, convert in self._serialization_plan:
+            # Загруженные значения берём напрямую, минуя дескрипторы атрибутов
+            value = state[key] if key in state else getattr(self, key)
+            if convert is not None and value is not None:
+                value = convert(value)
             if not exclude_none or value is not None:
-                result[column.key] = value
-
+                result[key] = value
         return result
 
+    @classmethod
+    def to_dicts(cls, rows: Iterable["Base"], exclude_none: bool = False) -> list[dict]:
+        """
+        Преобразует список объектов модели в список словарей.
+
+        Args:
+            rows: Объекты модели `cls`
+            exclude_none (bool): Исключать ли None значения из результата
+
+        Returns:
+            list[dict]: Словари с данными объектов
+        """
+        return [row.to_dict(exclude_none) for row in rows]
+
     def __repr__(self) -> str:
         """Строковое представление объекта для удобства отладки."""
         return f"<{self.__class__.__name__}(id={self.id}, created_at={self.created_at}, updated_at={self.updated_at})>"
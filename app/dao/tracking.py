@@ -0,0 +1,143 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from loguru import logger
+
+from app.config import settings
+from app.log import SENSITIVE_KEYS
+
+# Оформление имён параметров вокруг имени колонки: префиксы фильтров (f_) и bulk_update (b_) BaseDAO,
+# суффиксы SQLAlchemy для одноимённых параметров (_1) и строк многострочного INSERT ... VALUES (_m0)
+_BIND_NAME_DECORATION = re.compile(r"^[fb]_|_m?\d+$")
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос к API выполнил больше обращений к БД, чем разрешено в строгом режиме."""
+
+    def __init__(self, label: str, budget: int):
+        super().__init__(f"{label}: превышен бюджет запросов к БД ({budget})")
+        self.label = label
+        self.budget = budget
+
+
+class RequestQueries:
+    """Запросы к БД, выполненные в рамках одного запроса к API."""
+    __slots__ = ("label", "count", "statements")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.statements: Counter[str] = Counter()
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Одинаковые запросы, выполненные не меньше `threshold` раз, - признак N+1."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+def _redacted_parameters(context, parameters, executemany: bool) -> Any:
+    """Параметры запроса для лога: значения чувствительных полей маскируются по именам параметров."""
+    if executemany:
+        return f"<{len(parameters)} наборов параметров>"
+    if isinstance(parameters, dict):
+        named = parameters
+    else:
+        names = getattr(context.compiled, "positiontup", None) or range(len(parameters))
+        named = dict(zip(map(str, names), parameters))
+    return {
+        name: "***" if _BIND_NAME_DECORATION.sub("", name).lower() in SENSITIVE_KEYS else value
+        for name, value in named.items()
+    }
+
+
+class QueryTracker:
+    """
+    Учёт запросов к БД в рамках каждого запроса к API по событиям курсора SQLAlchemy
+    (обработчики регистрируются в app.dao.database вместе с остальными потребителями).
+
+    Считает выполненные выражения, после запроса предупреждает о повторяющихся одинаковых
+    выражениях (N+1, например обход `role.users` с ленивой загрузкой) и о превышении бюджета,
+    а медленные выражения пишет в лог сразу, с замаскированными параметрами. В строгом режиме
+    (для тестов) выражение сверх бюджета не выполняется: выбрасывается QueryBudgetExceeded.
+    """
+
+    def __init__(
+            self,
+            slow_threshold: float,
+            repeat_threshold: int,
+            budget: int,
+            strict: bool = False
+    ):
+        self.slow_threshold = slow_threshold
+        self.repeat_threshold = repeat_threshold
+        self.budget = budget
+        self.strict = strict
+        self._current: ContextVar[RequestQueries | None] = ContextVar("request_queries", default=None)
+
+    def current(self) -> RequestQueries | None:
+        return self._current.get()
+
+    @contextmanager
+    def track(self, label: str) -> Iterator[RequestQueries]:
+        """Учитывает запросы к БД внутри блока; по выходу пишет в лог найденные проблемы."""
+        queries = RequestQueries(label)
+        token = self._current.set(queries)
+        try:
+            yield queries
+        finally:
+            self._current.reset(token)
+            self._report(queries)
+
+    def _report(self, queries: RequestQueries) -> None:
+        for statement, count in queries.repeated(self.repeat_threshold):
+            logger.warning(
+                "Возможный N+1 в {label}: одинаковый запрос выполнен {count} раз: {statement}",
+                label=queries.label, count=count, statement=statement)
+        if queries.count > self.budget:
+            logger.warning(
+                "{label}: выполнено {count} запросов к БД при бюджете {budget}",
+                label=queries.label, count=queries.count, budget=self.budget)
+
+    def count(self, statement: str) -> None:
+        """Учитывает выражение перед выполнением; в строгом режиме выражение сверх бюджета не выполняется."""
+        queries = self._current.get()
+        if queries is not None:
+            if self.strict and queries.count >= self.budget:
+                raise QueryBudgetExceeded(queries.label, self.budget)
+            queries.count += 1
+            queries.statements[statement] += 1
+
+    def observe(self, elapsed: float, statement: str, parameters, context, executemany: bool) -> None:
+        """Пишет в лог выражение, выполнявшееся дольше порога."""
+        if elapsed < self.slow_threshold:
+            return
+        queries = self._current.get()
+        logger.warning(
+            "Медленный запрос ({elapsed:.1f} мс, {label}): {statement} с параметрами {parameters}",
+            elapsed=elapsed * 1000, label=queries.label if queries is not None else "вне запроса",
+            statement=statement, parameters=_redacted_parameters(context, parameters, executemany))
+
+
+class QueryTrackingMiddleware:
+    """ASGI-middleware, включающее учёт запросов к БД для каждого HTTP-запроса."""
+
+    def __init__(self, app, tracker: QueryTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with self.tracker.track(f"{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
+
+
+query_tracker = QueryTracker(
+    slow_threshold=settings.DAO_SLOW_QUERY_MS / 1000,
+    repeat_threshold=settings.DAO_REPEATED_QUERY_THRESHOLD,
+    budget=settings.DAO_QUERY_BUDGET,
+    strict=settings.DAO_QUERY_BUDGET_STRICT,
+)
@@ -1,16 +1,21 @@
-from datetime import datetime, timezone
 from fastapi import Request, Depends, Response
 from jose import jwt, JWTError, ExpiredSignatureError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dao import UsersDAO
 from app.auth.models import User
+from app.auth.principal import Principal, principal_from_payload, token_versions
+from app.auth.revocation import token_revocations
+from app.auth.roles import role_registry
 from app.config import settings
 from app.dependencies.dao_dep import get_session_without_commit
 from app.exceptions import (
-    TokenNoFound, NoJwtException, TokenExpiredException, NoUserIdException, ForbiddenException, UserNotFoundException
+    TokenNoFound, NoJwtException, TokenExpiredException, NoUserIdException, ForbiddenException, UserNotFoundException,
+    TokenRevokedException
 )
-from app.auth.utils import set_tokens  # Предполагается импорт функции set_tokens
+from app.auth.utils import set_tokens, decode_access_token
+from app.metrics import token_decodes
+from app.timing import timed
 
 
 def get_access_token(request: Request) -> str:
@@ -29,19 +34,18 @@ def get_refresh_token(request: Request) -> str:
     return token
 
 
-async def check_refresh_token(
-        token: str,
-        session: AsyncSession = Depends(get_session_without_commit)
-) -> User:
+async def user_from_refresh_token(token: str, session: AsyncSession) -> User:
     """Проверяем refresh_token и возвращаем пользователя."""
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        with timed("token"):
+            payload = jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM]
+            )
+        token_decodes.inc("refresh", "decoded")
         user_id = payload.get("sub")
-        if not user_id:
+        if not user_id or token_revocations.is_revoked(payload.get("jti")):
             raise NoJwtException
 
         user = await UsersDAO(session).find_one_or_none_by_id(data_id=int(user_id))
@@ -50,9 +54,29 @@ async def check_refresh_token(
 
         return user
     except JWTError:
+        token_decodes.inc("refresh", "invalid")
         raise NoJwtException
 
 
+async def check_refresh_token(
+        token: str = Depends(get_refresh_token),
+        session: AsyncSession = Depends(get_session_without_commit)
+) -> User:
+    """Проверяем refresh_token из кук и возвращаем пользователя."""
+    return await user_from_refresh_token(token, session)
+
+
+async def refresh_user(request: Request, response: Response, session: AsyncSession) -> User:
+    """Обновляем токены по refresh_token после истечения access_token и возвращаем пользователя."""
+    try:
+        refresh_token = get_refresh_token(request)
+        user = await user_from_refresh_token(refresh_token, session)
+        set_tokens(response, user)
+        return user
+    except Exception:
+        raise TokenExpiredException
+
+
 async def get_current_user(
         request: Request,
         response: Response,
@@ -61,44 +85,65 @@ async def get_current_user(
 ) -> User:
     """Проверяем access_token, при истечении срока используем refresh_token для обновления."""
     try:
-        # Декодируем access токен
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        # Декодируем access токен; подпись и срок действия проверяются при первом обращении,
+        # дальше payload берётся из кеша до истечения токена
+        payload = decode_access_token(token)
     except ExpiredSignatureError:
         # Пытаемся обновить токены через refresh
-        try:
-            refresh_token = get_refresh_token(request)
-            user = await check_refresh_token(refresh_token, session)
-            set_tokens(response, user.id)
-            return user
-        except Exception:
-            raise TokenExpiredException
+        return await refresh_user(request, response, session)
     except JWTError:
         raise NoJwtException
 
-    # Проверяем срок действия access токена
-    expire: str = payload.get('exp')
-    expire_time = datetime.fromtimestamp(int(expire), tz=timezone.utc)
-    if (not expire) or (expire_time < datetime.now(timezone.utc)):
-        try:
-            refresh_token = get_refresh_token(request)
-            user = await check_refresh_token(refresh_token, session)
-            set_tokens(response, user.id)
-            return user
-        except Exception:
-            raise TokenExpiredException
-
     user_id: str = payload.get('sub')
     if not user_id:
         raise NoUserIdException
+    if token_revocations.is_revoked(payload.get('jti')):
+        raise TokenRevokedException
+    if 'ver' in payload and not token_versions.accept(int(user_id), payload['ver']):
+        raise TokenRevokedException
 
     user = await UsersDAO(session).find_one_or_none_by_id(data_id=int(user_id))
     if not user:
         raise UserNotFoundException
+    if 'ver' in payload and payload['ver'] < user.token_version:
+        raise TokenRevokedException
     return user
 
 
+async def get_current_principal(
+        request: Request,
+        response: Response,
+        token: str = Depends(get_access_token),
+        session: AsyncSession = Depends(get_session_without_commit)
+) -> Principal:
+    """
+    Проверяем access_token и возвращаем Principal по его claims без обращения к БД.
+
+    Истёкшие токены и токены без роли (TOKEN_ROLE_CLAIMS выключен) обрабатываются как в
+    get_current_user, с загрузкой пользователя.
+    """
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        payload = None
+    principal = principal_from_payload(payload) if payload is not None else None
+    if principal is None:
+        return Principal.from_user(await get_current_user(request, response, token, session))
+    revoked = token_revocations.is_revoked(payload.get('jti'))
+    if revoked or not token_versions.accept(principal.id, principal.version):
+        raise TokenRevokedException
+    return principal
+
+
 async def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
     """Проверяем права администратора."""
-    if current_user.role.id in [3, 4]:
+    if role_registry.is_admin(current_user.role_id):
         return current_user
-    raise ForbiddenException
\ No newline at end of file
+    raise ForbiddenException
+
+
+async def get_current_admin_principal(principal: Principal = Depends(get_current_principal)) -> Principal:
+    """Проверяем права администратора по claims access_token."""
+    if principal.is_admin:
+        return principal
+    raise ForbiddenException
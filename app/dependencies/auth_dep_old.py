@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dao import UsersDAO
 from app.auth.models import User
+from app.auth.roles import role_registry
 from app.config import settings
 from app.dependencies.dao_dep import get_session_without_commit
 from app.exceptions import (
@@ -83,6 +84,6 @@ async def get_current_user(
 
 async def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
     """Проверяем права пользователя как администратора."""
-    if current_user.role.id in [3, 4]:
+    if role_registry.is_admin(current_user.role_id):
         return current_user
     raise ForbiddenException
@@ -1,14 +1,21 @@
 from typing import AsyncGenerator
+from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dao.database import async_session_maker
+from app.dao.database import request_session_maker
 
 
-async def get_session_with_commit() -> AsyncGenerator[AsyncSession, None]:
-    """Асинхронная сессия с автоматическим коммитом."""
-    async with async_session_maker() as session:
+async def get_request_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Единая сессия запроса, общая для всех зависимостей.
+
+    Соединение берётся из пула при первом обращении к БД; коммит выполняется один раз в конце
+    запроса, если сессию запросила хотя бы одна зависимость с коммитом, иначе транзакция откатывается.
+    """
+    async with request_session_maker() as session:
         try:
             yield session
-            await session.commit()
+            if session.info.get('commit'):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -16,13 +23,13 @@ async def get_session_with_commit() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def get_session_without_commit() -> AsyncGenerator[AsyncSession, None]:
-    """Асинхронная сессия без автоматического коммита."""
-    async with async_session_maker() as session:
-        try:
-            yield session
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+async def get_session_with_commit(session: AsyncSession = Depends(get_request_session)) -> AsyncSession:
+    """Сессия запроса с автоматическим коммитом; чтения идут в основной движок, чтобы видеть свои записи."""
+    session.info['commit'] = True
+    session.info['primary'] = True
+    return session
+
+
+async def get_session_without_commit(session: AsyncSession = Depends(get_request_session)) -> AsyncSession:
+    """Сессия запроса без автоматического коммита; чтения направляются в движок для чтения."""
+    return session
@@ -30,6 +30,12 @@ TokenExpiredException = HTTPException(
     detail='Токен истек'
 )
 
+# Токен отозван
+TokenRevokedException = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail='Токен отозван'
+)
+
 # Некорректный формат токена
 InvalidTokenFormatException = HTTPException(
     status_code=status.HTTP_400_BAD_REQUEST,
@@ -61,6 +67,23 @@ ForbiddenException = HTTPException(
     detail='Недостаточно прав'
 )
 
+
+# Слишком много запросов; Retry-After - через сколько секунд можно повторить
+class TooManyRequestsException(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail='Слишком много запросов, повторите позже',
+            headers={'Retry-After': str(max(1, retry_after))}
+        )
+
+
+# Некорректный курсор пагинации
+InvalidCursorException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail='Некорректный курсор пагинации'
+)
+
 TokenInvalidFormatException = HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Неверный формат токена. Ожидается 'Bearer <токен>'"
@@ -0,0 +1,75 @@
+import sys
+from collections import defaultdict
+from typing import Any, Mapping
+
+from loguru import logger
+
+from app.config import settings
+
+# Ключи, значения которых не должны попадать в логи
+SENSITIVE_KEYS = frozenset({
+    "password", "confirm_password", "hashed_password", "token", "access_token", "refresh_token", "secret_key",
+})
+
+
+def redact(data: Mapping[str, Any]) -> dict:
+    """Копия словаря с замаскированными значениями чувствительных полей."""
+    return {key: "***" if key.lower() in SENSITIVE_KEYS else value for key, value in data.items()}
+
+
+class Redacted:
+    """
+    Ленивая обёртка над словарём для логирования.
+
+    Маскирование и форматирование выполняются только если сообщение действительно
+    выводится, поэтому на отключённых уровнях логирования обёртка почти ничего не стоит.
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data: Mapping[str, Any]):
+        self.data = data
+
+    def __str__(self) -> str:
+        return str(redact(self.data))
+
+    __repr__ = __str__
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
+
+
+class Sampler:
+    """Пропускает каждое N-е сообщение для ключа; используется для сообщений горячего пути."""
+
+    def __init__(self, every: int):
+        self.every = max(1, every)
+        self._counters: defaultdict[str, int] = defaultdict(int)
+
+    def __call__(self, key: str) -> bool:
+        if self.every == 1:
+            return True
+        count = self._counters[key]
+        self._counters[key] = count + 1
+        return count % self.every == 0
+
+
+sampled = Sampler(settings.LOG_SAMPLE_EVERY)
+
+
+def setup_logging() -> None:
+    """
+    Настраивает loguru: уровни по модулям, JSON-формат по желанию и очередь записи.
+
+    С LOG_ENQUEUE=True сообщения пишутся в sink фоновым потоком, и ввод-вывод логов
+    не блокирует обработку запросов.
+    """
+    levels = {"": settings.LOG_LEVEL, **settings.LOG_LEVELS}
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=min(logger.level(level).no for level in levels.values()),
+        filter=levels,
+        enqueue=settings.LOG_ENQUEUE,
+        serialize=settings.LOG_JSON,
+        backtrace=False,
+    )
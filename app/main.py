@@ -1,19 +1,60 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
 
+from app.auth.admission import admission_controller
+from app.auth.password import password_hasher
+from app.auth.principal import token_versions
+from app.auth.revocation import token_revocations
+from app.auth.roles import role_registry
 from app.auth.router import router as router_auth
+from app.config import settings
+from app.dao.audit import query_auditor
+from app.dao.database import async_session_maker, engine, read_engines, log_engine_settings
+from app.dao.tracking import QueryTrackingMiddleware, query_tracker
+from app.log import setup_logging
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.responses import default_response_class
+from app.timing import ServerTimingMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[dict, None]:
     """Управление жизненным циклом приложения."""
     logger.info("Инициализация приложения...")
+    await log_engine_settings(engine)
+    for read_engine in read_engines:
+        await log_engine_settings(read_engine)
+    async with async_session_maker() as session:
+        await role_registry.load(session)
+        await token_revocations.load(session)
+        await token_versions.load(session)
+    sync_tasks = []
+    if settings.TOKEN_REVOCATION_SYNC_INTERVAL > 0:
+        sync_tasks.append(asyncio.create_task(
+            token_revocations.run_sync(async_session_maker, settings.TOKEN_REVOCATION_SYNC_INTERVAL)))
+    if settings.TOKEN_VERSION_SYNC_INTERVAL > 0:
+        sync_tasks.append(asyncio.create_task(
+            token_versions.run_sync(async_session_maker, settings.TOKEN_VERSION_SYNC_INTERVAL)))
+    if settings.ROLE_REGISTRY_SYNC_INTERVAL > 0:
+        sync_tasks.append(asyncio.create_task(
+            role_registry.run_sync(async_session_maker, settings.ROLE_REGISTRY_SYNC_INTERVAL)))
     yield
     logger.info("Завершение работы приложения...")
+    for task in sync_tasks:
+        task.cancel()
+    password_hasher.shutdown()
+    logger.info(f"Контроль допуска операций с паролями: {admission_controller.stats()}")
+    if query_auditor.enabled:
+        await query_auditor.report(engine)
+    await engine.dispose()
+    for read_engine in read_engines:
+        await read_engine.dispose()
+    await logger.complete()
 
 
 def create_app() -> FastAPI:
@@ -23,6 +64,7 @@ def create_app() -> FastAPI:
    Returns:
        Сконфигурированное приложение FastAPI
    """
+    setup_logging()
     app = FastAPI(
         title="Стартовая сборка FastAPI",
         description=(
@@ -33,6 +75,7 @@ def create_app() -> FastAPI:
         ),
         version="1.0.0",
         lifespan=lifespan,
+        default_response_class=default_response_class(),
     )
 
     # Настройка CORS
@@ -44,6 +87,18 @@ def create_app() -> FastAPI:
         allow_headers=["*"]
     )
 
+    # Учёт запросов к БД, N+1 и бюджет запросов в рамках каждого запроса
+    if settings.DAO_QUERY_TRACKING:
+        app.add_middleware(QueryTrackingMiddleware, tracker=query_tracker)
+
+    # Заголовок Server-Timing с длительностями фаз запроса
+    if settings.SERVER_TIMING_ENABLED:
+        app.add_middleware(ServerTimingMiddleware, log=settings.SERVER_TIMING_LOG)
+
+    # Гистограмма длительности запросов по маршрутам для /metrics
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
     # Монтирование статических файлов
     app.mount(
         '/static',
@@ -70,6 +125,12 @@ def register_routers(app: FastAPI) -> None:
             "author": "Яковенко Алексей"
         }
 
+    if settings.METRICS_ENABLED:
+        @root_router.get("/metrics", include_in_schema=False)
+        async def metrics() -> Response:
+            """Метрики приложения в текстовом формате Prometheus."""
+            return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
     # Подключение роутеров
     app.include_router(root_router, tags=["root"])
     app.include_router(router_auth, prefix='/auth', tags=['Auth'])
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 from app.config import database_url
 from app.dao.database import Base
-from app.auth.models import Role, User
+from app.auth.models import Role, User, RevokedToken
 
 config = context.config
 config.set_main_option("sqlalchemy.url", database_url)
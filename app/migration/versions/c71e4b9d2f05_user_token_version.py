@@ -0,0 +1,29 @@
+"""User token version
+
+Revision ID: c71e4b9d2f05
+Revises: a3f9c2d41b7e
+Create Date: 2026-10-17 23:41:07.208415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71e4b9d2f05'
+down_revision: Union[str, None] = 'a3f9c2d41b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Версия access-токенов пользователя и индекс для синхронизации её изменений между процессами
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_updated_at', table_name='users')
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,70 @@
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.config import settings
+from app.timing import timed
+
+try:
+    import orjson  # noqa: F401
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse, время сериализации которого учитывается в Server-Timing."""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    """ORJSONResponse, время сериализации которого учитывается в Server-Timing."""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+def default_response_class() -> type[JSONResponse]:
+    """Класс ответа по умолчанию: ORJSONResponse, если установлен orjson и он не отключён в настройках."""
+    if settings.USE_ORJSON and orjson is not None:
+        return TimedORJSONResponse
+    return TimedJSONResponse
+
+
+def trusted_models(model: type[BaseModel], rows: Iterable[Any]) -> list:
+    """
+    Строит экземпляры схемы из доверенных данных (ORM-объектов или строк БД) без валидации.
+
+    Данные из БД уже прошли валидацию при записи; повторная проверка полей вроде EmailStr
+    занимает большую часть времени сериализации больших списков.
+    """
+    fields = tuple(model.model_fields)
+    construct = model.model_construct
+    with timed("serialize"):
+        return [construct(**{name: getattr(row, name) for name in fields}) for row in rows]
+
+
+def json_response(
+        adapter: TypeAdapter,
+        data: Any,
+        status_code: int = 200,
+        response: Response | None = None
+) -> Response:
+    """
+    Сериализует данные заранее собранным TypeAdapter сразу в байты JSON, минуя jsonable_encoder.
+
+    FastAPI применяет заголовки внедрённого в обработчик `response` (например, Set-Cookie
+    от обновления токенов в зависимостях) только к ответам, которые строит сам, поэтому
+    его заголовки переносятся в возвращаемый ответ.
+    """
+    with timed("serialize"):
+        content = adapter.dump_json(data)
+    result = Response(content=content, status_code=status_code, media_type="application/json")
+    if response is not None:
+        result.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name != b"content-length")
+    return result
@@ -0,0 +1,108 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from loguru import logger
+
+from app.dao.tracking import query_tracker
+
+# Фазы в порядке вывода в заголовке Server-Timing
+PHASES = ("token", "db", "password", "serialize")
+
+
+class RequestTimings:
+    """Накопленные длительности фаз одного запроса (секунды)."""
+    __slots__ = ("started", "durations")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+    def header(self, total: float, queries: int = 0) -> bytes:
+        metrics = [f"{phase};dur={self.durations[phase] * 1000:.3f}" for phase in PHASES if phase in self.durations]
+        if queries:
+            metrics.append(f'queries;desc="{queries}"')
+        metrics.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(metrics).encode("latin-1")
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Добавляет время выполнения блока к фазе текущего запроса; вне запроса ничего не делает."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+def observe_query(elapsed: float) -> None:
+    """Добавляет время выполнения запроса к БД к фазе `db` текущего запроса."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add("db", elapsed)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI-middleware, добавляющее к ответу заголовок Server-Timing с длительностями фаз запроса.
+
+    Фазы: декодирование токена, выполнение запросов к БД (события курсора SQLAlchemy), хеширование
+    паролей и сериализация ответа; `total` - время до начала отправки ответа. Число запросов к БД
+    берётся из учёта запросов (DAO_QUERY_TRACKING) и без него не выводится. Реализовано без
+    BaseHTTPMiddleware, чтобы не оборачивать тело ответа в дополнительные задачи и потоки.
+    С `log=True` длительности также пишутся в лог отдельной структурированной записью.
+    """
+
+    def __init__(self, app, log: bool = False):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 0
+        queries = 0
+
+        async def send_with_timing(message) -> None:
+            nonlocal status, queries
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = time.perf_counter() - timings.started
+                # Учёт запросов включается внутренним middleware и виден только до возврата из приложения
+                request_queries = query_tracker.current()
+                queries = request_queries.count if request_queries is not None else 0
+                message["headers"] = [
+                    *message.get("headers", ()), (b"server-timing", timings.header(total, queries))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if self.log:
+                durations = {phase: round(seconds * 1000, 3) for phase, seconds in timings.durations.items()}
+                logger.bind(server_timing=durations, queries=queries).info(
+                    f"{scope['method']} {scope['path']} {status}: "
+                    f"{(time.perf_counter() - timings.started) * 1000:.1f} мс, {durations}"
+                )
@@ -0,0 +1,44 @@
+"""Общие помощники бенчмарков: временная БД SQLite, схема и справочник ролей."""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+ROLE_NAMES = ["User", "Moderator", "Admin", "SuperAdmin"]
+
+
+def use_temp_database(log_level: str = "WARNING") -> str:
+    """
+    Направляет приложение во временную БД SQLite.
+
+    Вызывается до импорта модулей app, так как настройки читаются при импорте.
+    """
+    directory = tempfile.mkdtemp(prefix="fabic-bench-")
+    url = f"sqlite+aiosqlite:///{directory}/bench.sqlite3"
+    os.environ["DB_URL"] = url
+    os.environ.setdefault("LOG_LEVEL", log_level)
+    return url
+
+
+async def create_schema() -> None:
+    """Создаёт таблицы и заполняет справочник ролей, как начальная миграция."""
+    from sqlalchemy import insert
+
+    from app.auth.models import Role
+    from app.dao.database import Base, engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Role), [{"name": name} for name in ROLE_NAMES])
+
+
+@contextmanager
+def timer() -> Iterator[list[float]]:
+    """Измеряет время блока; результат в секундах записывается в возвращаемый список."""
+    elapsed: list[float] = []
+    started = time.perf_counter()
+    try:
+        yield elapsed
+    finally:
+        elapsed.append(time.perf_counter() - started)
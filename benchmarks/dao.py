@@ -0,0 +1,114 @@
+"""
+Микробенчмарки методов BaseDAO на таблице users разного размера.
+
+Одна временная БД SQLite последовательно дозаполняется до каждого размера из --sizes, после чего
+замеряется каждый метод UsersDAO. Каждый вызов выполняется в отдельной сессии; изменения
+откатываются, чтобы размер таблицы не менялся. Кеш записей по ID выключен, чтобы мерить запросы к БД.
+
+Запуск: python -m benchmarks.dao [--sizes 10000 100000 1000000] [--repeat 200] [--output dao.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+from benchmarks.common import create_schema, use_temp_database
+from benchmarks.seed import seed_users
+
+BATCH_SIZE = 1000
+
+
+def operations(size: int, rng: random.Random) -> dict:
+    """Операции бенчмарка: имя -> (число повторов относительно --repeat, корутина от DAO)."""
+
+    def user_id() -> int:
+        return rng.randrange(1, size + 1)
+
+    def new_users(count: int) -> list[dict]:
+        start = rng.randrange(10 ** 8)
+        return [{
+            "email": f"bench.{start}.{i}@example.com", "phone_number": f"+78{start:08d}{i:04d}",
+            "first_name": "Bench", "last_name": "User", "password": "x", "role_id": 1,
+        } for i in range(count)]
+
+    return {
+        "find_one_or_none_by_id": (1, lambda dao: dao.find_one_or_none_by_id(user_id())),
+        "find_one_or_none(phone)": (1, lambda dao: dao.find_one_or_none(phone_number=f"+79{user_id() - 1:09d}")),
+        "exists(phone_number)": (1, lambda dao: dao.exists(phone_number=f"+79{user_id() - 1:09d}")),
+        "find_all(role=SuperAdmin)": (0.05, lambda dao: dao.find_all(role_id=4)),
+        "find_all(role, columns)": (0.05, lambda dao: dao.find_all(role_id=4, columns=("id", "email"))),
+        "find_page(limit=50)": (1, lambda dao: dao.find_page(limit=50)),
+        "count(role_id)": (0.1, lambda dao: dao.count(role_id=2)),
+        "count()": (0.1, lambda dao: dao.count()),
+        f"add_many({BATCH_SIZE})": (0.1, lambda dao: dao.add_many(new_users(BATCH_SIZE))),
+        "update(id)": (1, lambda dao: dao.update({"id": user_id()}, {"first_name": "Updated"})),
+        f"bulk_update({BATCH_SIZE})": (0.1, lambda dao: dao.bulk_update(
+            [{"id": user_id(), "first_name": "Bulk"} for _ in range(BATCH_SIZE)])),
+        "delete(id)": (1, lambda dao: dao.delete({"id": user_id()})),
+    }
+
+
+async def measure(size: int, repeat: int, seed: int) -> dict:
+    from app.auth.dao import UsersDAO
+    from app.dao.database import async_session_maker
+
+    rng = random.Random(seed)
+    results = {}
+    for name, (share, call) in operations(size, rng).items():
+        calls = max(3, round(repeat * share))
+        latencies = []
+        for _ in range(calls):
+            async with async_session_maker() as session:
+                started = time.perf_counter()
+                await call(UsersDAO(session))
+                latencies.append(time.perf_counter() - started)
+                await session.rollback()
+        results[name] = {
+            "calls": calls,
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": statistics.quantiles(latencies, n=20, method="inclusive")[18] * 1000,
+        }
+        print(f"{size:>9} {name:<28}{calls:6d} вызовов  среднее {results[name]['mean_ms']:9.3f} мс  "
+              f"p50 {results[name]['p50_ms']:9.3f} мс  p95 {results[name]['p95_ms']:9.3f} мс")
+    return results
+
+
+async def run(sizes: list[int], repeat: int, seed: int) -> dict:
+    from app.dao.database import engine
+    from app.log import setup_logging
+
+    setup_logging()
+    await create_schema()
+    results = {}
+    seeded = 0
+    for size in sorted(sizes):
+        elapsed = await seed_users(size - seeded, seed=seed, offset=seeded)
+        print(f"Таблица users дозаполнена до {size} строк за {elapsed:.1f} с")
+        seeded = size
+        results[str(size)] = await measure(size, repeat, seed)
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=200, help="Число вызовов точечных операций")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    args = parser.parse_args()
+
+    use_temp_database()
+    os.environ.setdefault("DAO_IDENTITY_CACHE_ENABLED", "false")
+    results = asyncio.run(run(args.sizes, args.repeat, args.seed))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
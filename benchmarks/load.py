@@ -0,0 +1,219 @@
+"""
+Нагрузочный бенчмарк API авторизации: приложение create_app() на временной БД SQLite и
+конкурентные asyncio-клиенты через ASGI-транспорт без сети.
+
+Сценарии: регистрация, вход без кешей, /me из кешей, обновление токенов, список пользователей
+для администратора. Для каждого сценария выводятся пропускная способность и задержки p50/p95/p99;
+результаты сохраняются в JSON и могут сравниваться с сохранённым базовым прогоном.
+
+Запуск: python -m benchmarks.load [--concurrency 10] [--output results.json] [--baseline baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from benchmarks.common import ROLE_NAMES, create_schema, use_temp_database
+
+PASSWORD = "secret1"
+BASE_URL = "https://bench"  # https, чтобы клиент отправлял secure-куки
+
+# Число запросов на сценарий по умолчанию: операции с bcrypt заметно дороже остальных
+DEFAULT_REQUESTS = {
+    "register": 50,
+    "login_cold": 50,
+    "me_cached": 2000,
+    "refresh": 500,
+    "all_users": 200,
+}
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    elapsed: float
+    latencies: list[float]
+
+    def summary(self) -> dict:
+        quantiles = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "throughput_rps": self.requests / self.elapsed,
+            "p50_ms": quantiles[49] * 1000,
+            "p95_ms": quantiles[94] * 1000,
+            "p99_ms": quantiles[98] * 1000,
+        }
+
+
+async def seed_users(count: int) -> None:
+    """Пользователи user{i}@example.com с общим паролем; каждый десятый - администратор."""
+    from sqlalchemy import insert
+
+    from app.auth.models import User
+    from app.auth.password import get_password_hash
+    from app.dao.database import engine
+
+    admin_role_id = ROLE_NAMES.index("Admin") + 1
+    hashed = get_password_hash(PASSWORD)
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [{
+            "email": f"user{i}@example.com", "phone_number": f"+7900{i:07d}", "first_name": "Ivan",
+            "last_name": "Petrov", "password": hashed, "role_id": admin_role_id if i % 10 == 0 else 1,
+        } for i in range(count)])
+
+
+async def run_scenario(
+        name: str,
+        app,
+        requests: int,
+        concurrency: int,
+        setup: Callable[[object, int], Awaitable[None]] | None,
+        call: Callable[[object, int], Awaitable[object]],
+) -> ScenarioResult:
+    """Запускает `concurrency` клиентов, которые вместе выполняют `requests` вызовов `call`."""
+    import httpx
+
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(client) -> None:
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            response = await call(client, index)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    clients = [
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=BASE_URL) for _ in range(concurrency)
+    ]
+    try:
+        if setup is not None:
+            await asyncio.gather(*(setup(client, number) for number, client in enumerate(clients)))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for client in clients))
+        elapsed = time.perf_counter() - started
+    finally:
+        for client in clients:
+            await client.aclose()
+    return ScenarioResult(name=name, requests=requests, errors=errors, elapsed=elapsed, latencies=latencies)
+
+
+def scenarios(users: int) -> dict:
+    """Сценарии: (подготовка клиента, вызов) по имени."""
+
+    async def login(client, number: int):
+        # Администраторы - каждый десятый пользователь
+        return await client.post("/auth/login/", json={"email": f"user{number * 10 % users}@example.com",
+                                                       "password": PASSWORD})
+
+    async def register(client, index: int):
+        return await client.post("/auth/register/", json={
+            "email": f"new{index}@example.com", "phone_number": f"+7911{index:07d}", "first_name": "Anna",
+            "last_name": "Smirnova", "password": PASSWORD, "confirm_password": PASSWORD,
+        })
+
+    async def login_cold(client, index: int):
+        return await client.post("/auth/login/", json={"email": f"user{index % users}@example.com",
+                                                       "password": PASSWORD})
+
+    return {
+        "register": (None, register),
+        "login_cold": (None, login_cold),
+        "me_cached": (login, lambda client, index: client.get("/auth/me/")),
+        "refresh": (login, lambda client, index: client.post("/auth/refresh")),
+        "all_users": (login, lambda client, index: client.get("/auth/all_users/")),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Сравнивает с базовым прогоном; возвращает описания регрессий больше `tolerance` (доля)."""
+    regressions = []
+    print(f"\n{'сценарий':<12}{'p95, мс':>20}{'запросов/с':>24}")
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        p95_ratio = current["p95_ms"] / base["p95_ms"]
+        rps_ratio = current["throughput_rps"] / base["throughput_rps"]
+        print(
+            f"{name:<12}{base['p95_ms']:8.2f} -> {current['p95_ms']:8.2f}"
+            f"{base['throughput_rps']:10.1f} -> {current['throughput_rps']:9.1f}"
+        )
+        if p95_ratio > 1 + tolerance:
+            regressions.append(f"{name}: p95 вырос в {p95_ratio:.2f} раза")
+        if rps_ratio < 1 - tolerance:
+            regressions.append(f"{name}: пропускная способность упала до {rps_ratio:.0%}")
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from app.main import create_app
+
+    await create_schema()
+    await seed_users(args.users)
+    app = create_app()
+    selected = args.scenarios or list(DEFAULT_REQUESTS)
+    results = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "users": args.users,
+        "scenarios": {},
+    }
+    async with app.router.lifespan_context(app):
+        for name, (setup, call) in scenarios(args.users).items():
+            if name not in selected:
+                continue
+            requests = round(DEFAULT_REQUESTS[name] * args.scale)
+            result = await run_scenario(name, app, requests, args.concurrency, setup, call)
+            summary = results["scenarios"][name] = result.summary()
+            print(
+                f"{name:<12}{summary['requests']:6d} запросов, ошибок {summary['errors']:4d}, "
+                f"{summary['throughput_rps']:9.1f} запросов/с, p50 {summary['p50_ms']:8.2f} мс, "
+                f"p95 {summary['p95_ms']:8.2f} мс, p99 {summary['p99_ms']:8.2f} мс"
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=10, help="Число одновременных клиентов")
+    parser.add_argument("--users", type=int, default=200, help="Число пользователей в БД")
+    parser.add_argument("--scale", type=float, default=1.0, help="Множитель числа запросов сценариев")
+    parser.add_argument("--scenarios", nargs="*", choices=list(DEFAULT_REQUESTS), help="Запускаемые сценарии")
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    parser.add_argument("--baseline", help="JSON базового прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Допустимая регрессия, доля (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    use_temp_database()
+    # Все клиенты приходят с одного адреса: ограничение частоты входа исказило бы замеры
+    os.environ.setdefault("ADMISSION_ENABLED", "false")
+    results = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Бенчмарк чтения больших списков: полные ORM-объекты User против проекции колонок (Row).
+
+Запуск: python -m benchmarks.projection [--rows 50000]
+"""
+import argparse
+import asyncio
+import tracemalloc
+
+from benchmarks.common import create_schema, timer, use_temp_database
+
+
+async def run(rows: int) -> None:
+    from sqlalchemy import insert
+
+    from app.auth.dao import UsersDAO
+    from app.auth.models import User
+    from app.auth.schemas import USER_INFO_COLUMNS
+    from app.dao.database import async_session_maker, engine
+    from app.log import setup_logging
+
+    setup_logging()
+    await create_schema()
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [{
+            "email": f"user{i}@example.com", "phone_number": f"+7900{i:07d}", "first_name": "Ivan",
+            "last_name": "Petrov", "password": "$2b$12$" + "x" * 53, "email_verified": 0, "phone_verified": 0,
+            "role_id": 1,
+        } for i in range(rows)])
+
+    scenarios = {
+        "find_all() - ORM-объекты": {},
+        "find_all(columns=...) - Row": {"columns": USER_INFO_COLUMNS},
+    }
+    baseline = None
+    for name, options in scenarios.items():
+        async with async_session_maker() as session:
+            with timer() as elapsed:
+                records = await UsersDAO(session).find_all(**options)
+            tracked = len(session.identity_map)
+        # Память измеряется отдельным прогоном: tracemalloc искажает время
+        async with async_session_maker() as session:
+            tracemalloc.start()
+            records = await UsersDAO(session).find_all(**options)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        assert len(records) == rows
+        baseline = baseline or elapsed[0]
+        print(
+            f"{name:<32}{elapsed[0] * 1000:9.1f} мс  x{baseline / elapsed[0]:4.1f}  "
+            f"пик памяти {peak / 2 ** 20:7.1f} МиБ  объектов в сессии {tracked}"
+        )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+    use_temp_database()
+    asyncio.run(run(args.rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Бенчмарк сериализации списка пользователей в ответ /auth/all_users/.
+
+Сравнивает стандартный путь FastAPI (валидация по response_model, jsonable_encoder, json.dumps)
+с TypeAdapter(list[SUserInfo]) и сериализацией сразу в байты: с валидацией строк и без неё
+(model_construct для доверенных данных из БД, как в роутере).
+
+Запуск: python -m benchmarks.responses [--sizes 1000 10000 100000]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from typing import List
+
+from benchmarks.common import ROLE_NAMES, timer
+
+
+async def run(sizes: list[int]) -> None:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    from app.auth.models import User
+    from app.auth.roles import role_registry
+    from app.auth.schemas import SUserInfo, users_info_adapter
+    from app.responses import default_response_class, json_response, trusted_models
+
+    role_registry.set_roles(enumerate(ROLE_NAMES, start=1))
+    field = create_model_field(name="Response_get_all_users", type_=List[SUserInfo], mode="serialization")
+    response_class = default_response_class()
+    now = datetime.now()
+
+    for size in sizes:
+        users = [
+            User(id=i, email=f"user{i}@example.com", phone_number=f"+7900{i:07d}", first_name="Ivan",
+                 last_name="Petrov", password="x", role_id=i % 4 + 1, email_verified=0, phone_verified=0,
+                 created_at=now, updated_at=now)
+            for i in range(size)
+        ]
+        with timer() as standard:
+            content = await serialize_response(field=field, response_content=users)
+            standard_body = JSONResponse(content).body
+        with timer() as standard_class:
+            content = await serialize_response(field=field, response_content=users)
+            response_class(content)
+        with timer() as validated:
+            json_response(users_info_adapter, users_info_adapter.validate_python(users, from_attributes=True))
+        with timer() as fast:
+            fast_body = json_response(users_info_adapter, trusted_models(SUserInfo, users)).body
+        assert standard_body.replace(b" ", b"") == fast_body
+        print(
+            f"{size:>7} строк: FastAPI + JSONResponse {standard[0] * 1000:9.1f} мс, "
+            f"FastAPI + {response_class.__name__} {standard_class[0] * 1000:9.1f} мс, "
+            f"TypeAdapter с валидацией {validated[0] * 1000:9.1f} мс, "
+            f"TypeAdapter без валидации {fast[0] * 1000:9.1f} мс (x{standard[0] / fast[0]:.1f})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Быстрое наполнение БД синтетическими пользователями для бенчмарков.
+
+Пользователи вставляются пачками через executemany без ORM и без регистрации: хеш пароля bcrypt
+вычисляется один раз и переиспользуется. Данные детерминированы: одинаковые --seed и --offset
+дают одинаковые строки. Роли распределяются по четырём ролям из начальной миграции.
+
+Запуск: python -m benchmarks.seed --users 1000000 [--temp] [--offset 0] [--seed 42]
+Без --temp пользователи добавляются в БД из настроек приложения (DB_URL).
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Iterator
+
+from benchmarks.common import ROLE_NAMES, create_schema, use_temp_database
+
+DEFAULT_PASSWORD = "secret1"
+FIRST_NAMES = ["ivan", "anna", "petr", "olga", "sergey", "maria", "dmitry", "elena", "alexey", "natalia"]
+LAST_NAMES = ["ivanov", "petrova", "sidorov", "smirnova", "kuznetsov", "popova", "volkov", "sokolova"]
+# Доли ролей User, Moderator, Admin, SuperAdmin
+ROLE_WEIGHTS = [85, 10, 4, 1]
+
+
+def generate_users(count: int, password_hash: str, role_ids: list[int], seed: int = 42,
+                   offset: int = 0, chunk_size: int = 10_000) -> Iterator[list[dict]]:
+    """Пачки строк таблицы users; номера пользователей offset..offset+count-1 делают email и телефон уникальными."""
+    rng = random.Random(f"{seed}:{offset}")
+    for start in range(offset, offset + count, chunk_size):
+        stop = min(start + chunk_size, offset + count)
+        roles = rng.choices(role_ids, weights=ROLE_WEIGHTS, k=stop - start)
+        chunk = []
+        for number, role_id in zip(range(start, stop), roles):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            chunk.append({
+                "email": f"{first_name}.{last_name}.{number}@example.com",
+                "phone_number": f"+79{number:09d}",
+                "first_name": first_name.title(),
+                "last_name": last_name.title(),
+                "password": password_hash,
+                "role_id": role_id,
+                "email_verified": int(rng.random() < 0.7),
+                "phone_verified": int(rng.random() < 0.4),
+            })
+        yield chunk
+
+
+async def seed_users(count: int, seed: int = 42, offset: int = 0, password_hash: str | None = None) -> float:
+    """Добавляет `count` пользователей и возвращает время вставки в секундах."""
+    from sqlalchemy import select
+
+    from app.auth.models import Role, User
+    from app.auth.password import get_password_hash
+    from app.dao.database import engine
+
+    password_hash = password_hash or get_password_hash(DEFAULT_PASSWORD)
+    table = User.__table__
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        role_ids = list((await conn.execute(select(Role.id).order_by(Role.id))).scalars())
+        if len(role_ids) != len(ROLE_NAMES):
+            raise RuntimeError(f"Ожидались роли {ROLE_NAMES}, в БД найдено ролей: {len(role_ids)}")
+        for chunk in generate_users(count, password_hash, role_ids, seed=seed, offset=offset):
+            await conn.execute(table.insert(), chunk)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--offset", type=int, default=0, help="Номер первого пользователя (для дозаполнения)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--temp", action="store_true", help="Создать временную БД со схемой и ролями")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        if args.temp:
+            url = use_temp_database()
+            await create_schema()
+            print(f"Временная БД: {url}")
+        from app.dao.database import engine
+
+        elapsed = await seed_users(args.users, seed=args.seed, offset=args.offset)
+        await engine.dispose()
+        print(f"Добавлено пользователей: {args.users} за {elapsed:.1f} с ({args.users / elapsed:,.0f} строк/с)")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Бенчмарк сериализации моделей: прежний to_dict с инспекцией на каждый вызов против плана сериализации.
+
+Запуск: python -m benchmarks.serialization [--rows 100000]
+"""
+import argparse
+import tracemalloc
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from benchmarks.common import timer
+
+
+def legacy_to_dict(obj) -> dict:
+    """Прежняя реализация Base.to_dict: инспекция колонок и цепочка isinstance для каждого значения."""
+    from sqlalchemy import inspect
+
+    result = {}
+    for column in inspect(obj.__class__).columns:
+        value = getattr(obj, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+        result[column.key] = value
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    from app.auth.models import User
+
+    now = datetime.now()
+    users = [
+        User(id=i, email=f"user{i}@example.com", phone_number=f"+7900{i:07d}", first_name="Ivan",
+             last_name="Petrov", password="x", role_id=1, email_verified=0, phone_verified=0,
+             created_at=now, updated_at=now)
+        for i in range(args.rows)
+    ]
+
+    scenarios = {
+        "прежний to_dict": lambda: [legacy_to_dict(user) for user in users],
+        "to_dict с планом": lambda: [user.to_dict() for user in users],
+    }
+    baseline = None
+    for name, export in scenarios.items():
+        with timer() as elapsed:
+            export()
+        # Память измеряется отдельным прогоном: tracemalloc искажает время
+        tracemalloc.start()
+        export()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        baseline = baseline or elapsed[0]
+        print(f"{name:<20}{elapsed[0]:8.3f} с  x{baseline / elapsed[0]:5.1f}  пик памяти {peak / 2 ** 20:7.1f} МиБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Микробенчмарк накладных расходов на построение запросов в BaseDAO.
+
+Сравнивает сборку select(...).filter_by(**model.model_dump()) на каждый вызов с закешированным
+параметризованным запросом BaseDAO, в том числе с быстрым путём без Pydantic.
+
+Запуск: python -m benchmarks.statements [--calls 20000]
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import create_schema, timer, use_temp_database
+
+
+async def run(calls: int) -> None:
+    from sqlalchemy import insert, select
+
+    from app.auth.dao import UsersDAO
+    from app.auth.models import User
+    from app.auth.schemas import EmailModel
+    from app.dao.database import async_session_maker, engine
+    from app.log import setup_logging
+
+    setup_logging()
+    await create_schema()
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [{
+            "email": f"user{i}@example.com", "phone_number": f"+7900{i:07d}", "first_name": "Ivan",
+            "last_name": "Petrov", "password": "x", "email_verified": 0, "phone_verified": 0,
+        } for i in range(100)])
+    emails = [f"user{i % 100}@example.com" for i in range(calls)]
+
+    # Только построение запроса, без обращения к БД
+    with timer() as elapsed:
+        for email in emails:
+            query = select(User).filter_by(**EmailModel(email=email).model_dump(exclude_unset=True))
+            query._generate_cache_key()
+    print(f"{'построение на каждый вызов (без БД)':<45}{elapsed[0] / calls * 1e6:8.1f} мкс/вызов")
+
+    dao_probe = UsersDAO(None)
+    with timer() as elapsed:
+        for email in emails:
+            query, params = dao_probe._statement(
+                ('find', None), {'email': email}, lambda where: select(User).where(*where))
+            query._generate_cache_key()
+    print(f"{'кеш BaseDAO (без БД)':<45}{elapsed[0] / calls * 1e6:8.1f} мкс/вызов")
+
+    # Полный вызов с выполнением запроса
+    async with async_session_maker() as session:
+        dao = UsersDAO(session)
+        scenarios = {
+            "select().filter_by() + Pydantic": lambda email: session.execute(
+                select(User).filter_by(**EmailModel(email=email).model_dump(exclude_unset=True))),
+            "BaseDAO.find_one_or_none(EmailModel)": lambda email: dao.find_one_or_none(EmailModel(email=email)),
+            "BaseDAO.find_one_or_none(email=...)": lambda email: dao.find_one_or_none(email=email),
+        }
+        for name, call in scenarios.items():
+            with timer() as elapsed:
+                for email in emails:
+                    await call(email)
+            print(f"{name:<45}{elapsed[0] / calls * 1e6:8.1f} мкс/вызов")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+    use_temp_database()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()